@@ -5,18 +5,50 @@ scikits.umfpack
 
 Interface to UMFPACK linear solver.
 
+The easy-to-use interface is described in `scikits.umfpack.interface`, the
+low-level interface in `scikits.umfpack.umfpack`. The submodules, and with
+them SciPy and the UMFPACK extension, are imported on first access to their
+contents.
+
 """
 
 from __future__ import division, print_function, absolute_import
 
-from .umfpack import *
-from .interface import *
+from importlib import import_module as _import_module
+
+_submodules = ('umfpack', 'interface')
+_interface_names = ('spsolve', 'splu', 'UmfpackLU', 'clear_symbolic_cache')
+
+
+def _import(name):
+    return _import_module('.' + name, __name__)
+
+
+def _public_names():
+    names = [s for s in dir(_import('umfpack')) if not s.startswith('_')]
+    return set(names).union(_interface_names, _submodules)
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return _import(name)
+
+    if name == '__all__':
+        value = sorted(_public_names())
+    elif name in _interface_names:
+        value = getattr(_import('interface'), name)
+    elif name.startswith('_') or not hasattr(_import('umfpack'), name):
+        raise AttributeError('module %r has no attribute %r'
+                             % (__name__, name))
+    else:
+        value = getattr(_import('umfpack'), name)
+
+    globals()[name] = value
+    return value
 
-if __doc__ is not None:
-    from .umfpack import __doc__ as _umfpack_doc
-    from .interface import __doc__ as _interface_doc
-    __doc__ += _interface_doc
-    __doc__ += _umfpack_doc
-    del _umfpack_doc, _interface_doc
 
-__all__ = [s for s in dir() if not s.startswith('_')]
+def __dir__():
+    # Without the private helpers of this module.
+    names = [s for s in globals()
+             if s.startswith('__') or not s.startswith('_')]
+    return sorted(_public_names().union(names))
@@ -13,20 +13,28 @@ equation systems:
    spsolve
    splu
    UmfpackLU
+   clear_symbolic_cache
 
 """
 
 from __future__ import division, print_function, absolute_import
 
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock, local
 from warnings import warn
-import sys
 import numpy as np
 import scipy.sparse as sparse
 from numpy import asarray
 from scipy.sparse import (isspmatrix_csc, isspmatrix_csr, issparse,
-                          SparseEfficiencyWarning, csc_matrix, hstack)
+                          SparseEfficiencyWarning, csc_matrix)
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+from scipy.sparse.linalg import spsolve_triangular
 
-from .umfpack import UmfpackContext, UMFPACK_A
+from .umfpack import (UmfpackContext, UMFPACK_A, UMFPACK_Aat, UMFPACK_At,
+                      UMFPACK_IRSTEP, UMFPACK_STRATEGY,
+                      umfDefines, umfOrderings, UMFPACK_STRATEGY_AUTO,
+                      UMFPACK_STRATEGY_SYMMETRIC, UMFPACK_STRATEGY_UNSYMMETRIC)
 
 _families = {
     (np.float64, np.int32): 'di',
@@ -35,14 +43,176 @@ _families = {
     (np.complex128, np.int64): 'zl'
 }
 
-__all__ = ['spsolve', 'splu', 'UmfpackLU']
+_strategies = {
+    'auto': UMFPACK_STRATEGY_AUTO,
+    'unsymmetric': UMFPACK_STRATEGY_UNSYMMETRIC,
+    'symmetric': UMFPACK_STRATEGY_SYMMETRIC,
+}
+
+_transposes = {
+    'N': UMFPACK_A,
+    'T': UMFPACK_Aat,
+    'H': UMFPACK_At,
+}
+
+__all__ = ['spsolve', 'splu', 'UmfpackLU', 'clear_symbolic_cache']
+
+# Symbolic factorizations shared by UmfpackLU(A, reuse_symbolic=True), keyed
+# by the sparsity pattern of A. The values are the contexts owning them. An
+# entry whose owner freed its symbolic object is dropped on the next lookup.
+_symbolic_cache = OrderedDict()
+_symbolic_cache_size = 32
+_symbolic_cache_lock = Lock()
+
+
+def _cached_symbolic(A, family, control, perm_c=None, assume_sorted=False):
+    """
+    Return a context holding the symbolic factorization of the sparsity
+    pattern of A, computing it if it is not in the cache.
+
+    `control` is a dict of control parameters affecting the factorization.
+    """
+    nnz = A.indptr[-1]
+    key = (family, A.shape,
+           blake2b(A.indptr).digest(), blake2b(A.indices[:nnz]).digest(),
+           tuple(sorted(control.items())),
+           None if perm_c is None else blake2b(perm_c).digest())
+    with _symbolic_cache_lock:
+        umf = _symbolic_cache.get(key)
+        if umf is not None:
+            if umf._symbolic is not None:
+                _symbolic_cache.move_to_end(key)
+                return umf
+            # Freed by free_symbolic() or free() of the owner.
+            del _symbolic_cache[key]
+
+        umf = UmfpackContext(family)
+        for ic, val in control.items():
+            umf.control[ic] = val
+        umf.symbolic(A, Qinit=perm_c, assume_sorted=assume_sorted)
+        _symbolic_cache[key] = umf
+        if len(_symbolic_cache) > _symbolic_cache_size:
+            _symbolic_cache.popitem(last=False)
+        return umf
+
+
+def clear_symbolic_cache():
+    """
+    Drop all symbolic factorizations cached by ``UmfpackLU(A,
+    reuse_symbolic=True)``.
+
+    A symbolic factorization still used by some UmfpackLU objects is freed
+    together with the last of them.
+    """
+    with _symbolic_cache_lock:
+        _symbolic_cache.clear()
 
 
-if sys.version_info[0] >= 3:
-    xrange = range
+class _ContextPools(local):
+    """
+    Contexts freed by UmfpackLU.close() and spsolve, per thread and family.
+    """
+    size = 8
+
+    def __init__(self):
+        self.pools = dict((family, []) for family in _families.values())
+
+
+_context_pools = _ContextPools()
+
+
+def _get_context(family):
+    """
+    Return a context of the given family, reusing a pooled one if possible.
+    """
+    pool = _context_pools.pools[family]
+    if pool:
+        return pool.pop()
+    return UmfpackContext(family)
+
+
+def _release_context(umf):
+    """
+    Free the factorization held by umf, restore its default settings and
+    put umf into the pool.
+    """
+    umf.reset()
 
+    pool = _context_pools.pools[umf.family]
+    if len(pool) < _context_pools.size:
+        pool.append(umf)
 
-def spsolve(A, b):
+
+def _prepare_matrix(A, assume_sorted=False):
+    """
+    Convert A to a sorted CSC/CSR matrix with float64 or complex128 values,
+    if needed, and return it with the corresponding UMFPACK family.
+    """
+    if not (
+        isspmatrix_csc(A)
+        or isspmatrix_csr(A)
+        or (
+            hasattr(sparse, "csc_array")
+            and (isinstance(A, sparse.csc_array) or isinstance(A, sparse.csr_array))
+        )
+    ):
+        A = csc_matrix(A)
+        warn('spsolve requires A be CSC or CSR matrix format',
+                SparseEfficiencyWarning)
+
+    if not (assume_sorted or A.has_sorted_indices):
+        A.sort_indices()
+    if A.dtype.char not in 'dD':
+        A = A.asfptype()  # upcast to a floating point format
+
+    M, N = A.shape
+    if (M != N):
+        raise ValueError("matrix must be square (has shape %s)" % ((M, N),))
+
+    f_type = np.sctypeDict[A.dtype.name]
+    i_type = np.sctypeDict[A.indices.dtype.name]
+    try:
+        family = _families[(f_type, i_type)]
+
+    except KeyError:
+        msg = 'only float64 or complex128 matrices with int32 or int64' \
+            ' indices are supported! (got: matrix: %s, indices: %s)' \
+            % (f_type, i_type)
+        raise ValueError(msg)
+
+    return A, family
+
+
+def _rhs_array(A, b):
+    """
+    Return the dense right-hand side b as a 2D Fortran-ordered array.
+    """
+    if b.shape[0] != A.shape[1]:
+        raise ValueError("Shape of b is not compatible with that of A")
+    # Columns of Fortran-ordered arrays are contiguous. Convert b to the
+    # matrix dtype and order in a single copy, if any.
+    return asarray(b.reshape(b.shape[0], -1), dtype=A.dtype, order='F')
+
+
+def _solve_columns(umf, A, b, Wi=None, W=None, sys=UMFPACK_A,
+                   check_cond=True, control=None):
+    """
+    Solve A x = b for each column of a 2D b using the numeric object of umf.
+
+    `sys` selects the system to solve, see `_transposes`. A CSR matrix
+    is only allowed with UMFPACK_A. The workspace is allocated if not given.
+    """
+    return umf.solve_batch(sys, A, b, sys == UMFPACK_A, Wi, W, check_cond,
+                           control)
+
+
+def _invert_permutation(p):
+    inv = np.empty_like(p)
+    inv[p] = np.arange(p.shape[0], dtype=p.dtype)
+    return inv
+
+
+def spsolve(A, b, factorize=False, refinement_steps=None):
     """Solve the sparse linear system Ax=b, where b may be a vector or a matrix.
 
     Parameters
@@ -51,6 +221,12 @@ def spsolve(A, b):
         The square matrix A will be converted into CSC or CSR form
     b : ndarray or sparse matrix
         The matrix or vector representing the right hand side of the equation.
+    factorize : bool, optional
+        If True, solve using a `UmfpackLU` object. By default, a bare UMFPACK
+        context is used and its factorization is freed right after solving.
+    refinement_steps : int, optional
+        Maximum number of iterative refinement steps, overriding the UMFPACK
+        default (2). Use 0 to skip the refinement.
 
     Returns
     -------
@@ -60,7 +236,22 @@ def spsolve(A, b):
         If b is a matrix, then x is a matrix of size (A.shape[0],)+b.shape[1:]
 
     """
-    x = UmfpackLU(A).solve(b)
+    if factorize:
+        x = UmfpackLU(A).solve(b, refinement_steps=refinement_steps)
+    else:
+        A, family = _prepare_matrix(A)
+        b_dense = b.toarray() if issparse(b) else b
+        b_arr = _rhs_array(A, b_dense)
+
+        umf = _get_context(family)
+        if refinement_steps is not None:
+            umf.control[UMFPACK_IRSTEP] = refinement_steps
+        try:
+            umf.numeric(A)
+            x = _solve_columns(umf, A, b_arr)
+        finally:
+            _release_context(umf)
+        x = x.reshape((A.shape[0],) + b_dense.shape[1:])
 
     if b.ndim == 2 and b.shape[1] == 1:
         # compatibility with scipy.sparse.spsolve quirk
@@ -69,7 +260,8 @@ def spsolve(A, b):
         return x
 
 
-def splu(A):
+def splu(A, reuse_symbolic=False, ordering=None, strategy=None, perm_c=None,
+         assume_sorted=False):
     """
     Compute the LU decomposition of a sparse, square matrix.
 
@@ -77,6 +269,13 @@ def splu(A):
     ----------
     A : sparse matrix
         Sparse matrix to factorize. Should be in CSR or CSC format.
+    reuse_symbolic : bool, optional
+        Reuse the symbolic factorization of a previous matrix with the same
+        sparsity pattern, see `UmfpackLU`.
+    ordering, strategy, perm_c : optional
+        Fill-reducing ordering options, see `UmfpackLU`.
+    assume_sorted : bool, optional
+        Skip checking that the indices of A are sorted, see `UmfpackLU`.
 
     Returns
     -------
@@ -88,7 +287,9 @@ def splu(A):
     This function uses the UMFPACK library.
 
     """
-    return UmfpackLU(A)
+    return UmfpackLU(A, reuse_symbolic=reuse_symbolic, ordering=ordering,
+                     strategy=strategy, perm_c=perm_c,
+                     assume_sorted=assume_sorted)
 
 
 class UmfpackLU(object):
@@ -102,7 +303,29 @@ class UmfpackLU(object):
     Parameters
     ----------
     A : csc_matrix or csr_matrix
-        Matrix to decompose
+        Matrix to decompose. A CSR matrix is converted to CSC.
+    reuse_symbolic : bool, optional
+        If True, reuse the symbolic factorization (fill-reducing ordering)
+        computed for a previous matrix with the same sparsity pattern. The
+        most recently used symbolic factorizations are cached, see
+        `clear_symbolic_cache`.
+    ordering : {'amd', 'cholmod', 'metis', 'best', 'natural', 'given', 'rcm'}, optional
+        Fill-reducing ordering used by UMFPACK. 'amd' (AMD or COLAMD,
+        depending on the strategy) is the UMFPACK default. 'cholmod' and
+        'metis' need UMFPACK built with CHOLMOD. 'best' tries several
+        orderings and keeps the one with the least fill-in. 'natural' uses
+        no ordering and 'given' uses `perm_c`. 'rcm' gives the reverse
+        Cuthill-McKee ordering of the pattern of A + A.T to UMFPACK as
+        `perm_c`, which is cheaper to compute for e.g. banded matrices.
+    strategy : {'auto', 'unsymmetric', 'symmetric'}, optional
+        UMFPACK strategy (default 'auto').
+    perm_c : array_like, optional
+        Column permutation to use with ordering='given'.
+    assume_sorted : bool, optional
+        If True, the indices of A are assumed to be sorted and are not
+        checked. A CSC matrix with float64 or complex128 values and sorted
+        indices is used as is, without making a copy. A CSR matrix is always
+        converted to CSC.
 
     Attributes
     ----------
@@ -118,6 +341,10 @@ class UmfpackLU(object):
     -------
     solve
     solve_sparse
+    get_solver
+    reconstruct
+    refactorize
+    close
 
     Examples
     --------
@@ -160,67 +387,95 @@ class UmfpackLU(object):
 
     The permutation matrices can be constructed:
 
-    >>> Pr = csc_matrix((4, 4))
-    >>> Pr[lu.perm_r, np.arange(4)] = 1
-    >>> Pc = csc_matrix((4, 4))
-    >>> Pc[np.arange(4), lu.perm_c] = 1
+    >>> ones = np.ones(4)
+    >>> Pr = csc_matrix((ones, (lu.perm_r, np.arange(4))), shape=(4, 4))
+    >>> Pc = csc_matrix((ones, (np.arange(4), lu.perm_c)), shape=(4, 4))
 
     Similarly for the row scalings:
 
-    >>> R = csc_matrix((4, 4))
-    >>> R.setdiag(lu.R)
+    >>> R = csc_matrix((lu.R, (np.arange(4), np.arange(4))), shape=(4, 4))
 
     We can reassemble the original matrix:
 
-    >>> (Pr.T * R * (lu.L * lu.U) * Pc.T).A
+    >>> (R * Pr.T * (lu.L * lu.U) * Pc.T).A
     array([[ 1.,  2.,  0.,  4.],
            [ 1.,  0.,  0.,  1.],
            [ 1.,  0.,  2.,  1.],
            [ 2.,  2.,  1.,  0.]])
-    """
-
-    def __init__(self, A):
-        if not (
-            isspmatrix_csc(A)
-            or isspmatrix_csr(A)
-            or (
-                hasattr(sparse, "csc_array")
-                and (isinstance(A, sparse.csc_array) or isinstance(A, sparse.csr_array))
-            )
-        ):
-            A = csc_matrix(A)
-            warn('spsolve requires A be CSC or CSR matrix format',
-                    SparseEfficiencyWarning)
 
-        A.sort_indices()
-        A = A.asfptype()  # upcast to a floating point format
-
-        M, N = A.shape
-        if (M != N):
-            raise ValueError("matrix must be square (has shape %s)" % ((M, N),))
-
-        f_type = np.sctypeDict[A.dtype.name]
-        i_type = np.sctypeDict[A.indices.dtype.name]
-        try:
-            family = _families[(f_type, i_type)]
+    The same product is computed without the permutation and scaling
+    matrices by:
 
-        except KeyError:
-            msg = 'only float64 or complex128 matrices with int32 or int64' \
-                ' indices are supported! (got: matrix: %s, indices: %s)' \
-                % (f_type, i_type)
-            raise ValueError(msg)
+    >>> lu.reconstruct().A
+    array([[ 1.,  2.,  0.,  4.],
+           [ 1.,  0.,  0.,  1.],
+           [ 1.,  0.,  2.,  1.],
+           [ 2.,  2.,  1.,  0.]])
+    """
 
-        self.umf = UmfpackContext(family)
+    __slots__ = ('umf', '_A', '_L', '_U', '_P', '_Q', '_R', '_Wi', '_W',
+                 '_lock')
+
+    def __init__(self, A, reuse_symbolic=False, ordering=None, strategy=None,
+                 perm_c=None, assume_sorted=False):
+        A, family = _prepare_matrix(A, assume_sorted)
+        if A.format == 'csr':
+            # Factorize A itself rather than its transpose, so that the
+            # factors and all the systems of solve() use the CSC form.
+            A = A.tocsc()
+        M = A.shape[0]
+
+        control = {}
+        if ordering == 'rcm':
+            if perm_c is not None:
+                raise ValueError("perm_c requires ordering='given'")
+            perm_c = reverse_cuthill_mckee(A, symmetric_mode=False)
+            ordering = 'given'
+        if perm_c is not None:
+            if ordering not in (None, 'given'):
+                raise ValueError("perm_c requires ordering='given'")
+            ordering = 'given'
+            perm_c = np.ascontiguousarray(perm_c, dtype=A.indices.dtype)
+        elif ordering == 'given':
+            raise ValueError("ordering='given' requires perm_c")
+        if ordering is not None:
+            if ordering not in umfOrderings:
+                raise ValueError('unknown ordering: %s' % ordering)
+            # Defined if umfOrderings is not empty.
+            control[umfDefines['UMFPACK_ORDERING']] = umfOrderings[ordering]
+        if strategy is not None:
+            if strategy not in _strategies:
+                raise ValueError('unknown strategy: %s' % strategy)
+            control[UMFPACK_STRATEGY] = _strategies[strategy]
+
+        self.umf = _get_context(family)
+        for ic, val in control.items():
+            self.umf.control[ic] = val
+        # The symbolic and numeric phases run one after the other: symbolic()
+        # needs the prepared (sorted, upcast) matrix, numeric() needs the
+        # symbolic object, and only the small workspace allocation is left to
+        # overlap with them.
+        if reuse_symbolic:
+            self.umf.share_symbolic(_cached_symbolic(A, family, control,
+                                                     perm_c, assume_sorted))
+        else:
+            self.umf.symbolic(A, Qinit=perm_c, assume_sorted=assume_sorted)
         self.umf.numeric(A)
 
+        self._Wi, self._W = self.umf.workspace(M)
+
         self._A = A
         self._L = None
         self._U = None
         self._P = None
         self._Q = None
         self._R = None
+        # Serializes the use of the factorization, the workspace and the info
+        # array of self.umf. The UMFPACK calls release the GIL.
+        self._lock = Lock()
 
-    def solve(self, b):
+    def solve(self, b, method='umfpack', refinement_steps=None,
+              output_dtype=None, trans='N', check_cond=True):
         """
         Solve linear equation A x = b for x
 
@@ -228,6 +483,29 @@ class UmfpackLU(object):
         ----------
         b : ndarray
             Right-hand side of the matrix equation. Can be vector or a matrix.
+        method : {'umfpack', 'triangular'}, optional
+            With 'umfpack' (default), each column of b is solved by UMFPACK,
+            including iterative refinement. With 'triangular', the L and U
+            factors are used to solve for all columns at once by sparse
+            triangular solves, without iterative refinement. This may be
+            faster for many right-hand sides.
+        refinement_steps : int, optional
+            Maximum number of iterative refinement steps of the 'umfpack'
+            method, overriding the UMFPACK default (2) for this call. Use 0
+            to skip the refinement, e.g. when the caller refines the solution
+            itself. Cannot be used with the 'triangular' method.
+        output_dtype : dtype, optional
+            Data type of the solution. The system is always solved in double
+            precision; the solution is cast to this type, e.g. ``float32``
+            for single precision right-hand sides, before it is returned.
+        trans : {'N', 'T', 'H'}, optional
+            Solve A x = b ('N', default), A^T x = b ('T') or A^H x = b ('H')
+            with the same factorization. Only 'N' is supported with the
+            'triangular' method.
+        check_cond : bool, optional
+            If True (default), warn if the estimated condition number of A is
+            greater than ``self.umf.maxCond``. The 'triangular' method does
+            not check it.
 
         Returns
         -------
@@ -235,17 +513,100 @@ class UmfpackLU(object):
             Solution to the matrix equation
 
         """
+        if method not in ('umfpack', 'triangular'):
+            raise ValueError('unknown method: %s' % method)
+        if trans not in _transposes:
+            raise ValueError('trans must be N, T, or H')
+        if method == 'triangular' and trans != 'N':
+            raise ValueError("method='triangular' requires trans='N'")
+        if method == 'triangular' and refinement_steps is not None:
+            raise ValueError("refinement_steps requires method='umfpack'")
+        sys = _transposes[trans]
+
         if issparse(b):
             b = b.toarray()
 
-        if b.shape[0] != self._A.shape[1]:
-            raise ValueError("Shape of b is not compatible with that of A")
-        b_arr = asarray(b, dtype=self._A.dtype).reshape(b.shape[0], -1)
-        x = np.zeros((self._A.shape[0], b_arr.shape[1]), dtype=self._A.dtype)
-        for j in range(b_arr.shape[1]):
-            x[:,j] = self.umf.solve(UMFPACK_A, self._A, b_arr[:,j], autoTranspose=True)
+        b_arr = _rhs_array(self._A, b)
+        if method == 'triangular':
+            x = self._solve_triangular(b_arr)
+        else:
+            control = None
+            if refinement_steps is not None:
+                # A private copy, so that concurrent solves are not affected.
+                control = self.umf.control.copy()
+                control[UMFPACK_IRSTEP] = refinement_steps
+            with self._lock:
+                x = _solve_columns(self.umf, self._A, b_arr,
+                                   self._Wi, self._W, sys, check_cond,
+                                   control)
+        if output_dtype is not None:
+            x = x.astype(output_dtype, copy=False)
         return x.reshape((self._A.shape[0],) + b.shape[1:])
 
+    def _solve_triangular(self, b):
+        """
+        Solve A x = b for a 2D b using Pr * (R^-1) * A * Pc = L * U.
+        """
+        self._compute_lu()
+        y = np.empty_like(b)
+        y[self._P] = b / self._R[:, None]
+        y = spsolve_triangular(self._L, y, lower=True, unit_diagonal=True)
+        y = spsolve_triangular(self._U.tocsr(), y, lower=False)
+        return y[self._Q]
+
+    def get_solver(self, nrhs=1):
+        """
+        Return a function solving A x = b for dense b with nrhs columns.
+
+        The returned ``solve(b, out=None)`` copies b to a buffer allocated
+        here and lets UMFPACK write the solution directly to another one,
+        reusing the workspace and skipping the argument checks of `solve`.
+        This makes it cheaper than `solve` when called many times with
+        right-hand sides of the same shape. It always uses the current
+        factorization, also after `refactorize`. It is not thread-safe: use
+        one solver per thread.
+
+        Parameters
+        ----------
+        nrhs : int, optional
+            Number of columns of the right-hand sides. For ``nrhs=1``, b may
+            also be a vector.
+
+        Returns
+        -------
+        solve : callable
+            ``solve(b, out=None)`` returns the solution of A x = b with the
+            shape of b, written to `out` if given.
+
+        """
+        n = self._A.shape[0]
+        b_buf = np.empty((n, nrhs), dtype=self._A.dtype, order='F')
+        x_buf = np.empty((n, nrhs), dtype=self._A.dtype, order='F')
+        # The columns, also as float64 arrays, i.e. in the packed format if
+        # complex, as UmfpackContext.solve_raw() needs.
+        cols = [(x_col, x_col.view(np.float64), b_col.view(np.float64))
+                for x_col, b_col in zip(x_buf.T, b_buf.T)]
+
+        def solve(b, out=None):
+            if b.shape[0] != n or b.size != n * nrhs:
+                raise ValueError("Shape of b is not compatible with the solver")
+            np.copyto(b_buf, b.reshape(n, nrhs))
+            with self._lock:
+                umf, A = self.umf, self._A
+                data = A.data.view(np.float64)
+                for x_col, x_raw, b_raw in cols:
+                    status = umf.solve_raw(UMFPACK_A, A.indptr, A.indices,
+                                           data, x_raw, b_raw,
+                                           self._Wi, self._W)
+                    umf.check_status(status, x_col)
+                umf.check_condition()
+            if out is None:
+                return x_buf.reshape(b.shape).copy()
+            out[...] = x_buf.reshape(b.shape)
+            return out
+
+        return solve
+
     def solve_sparse(self, B):
         """
         Solve linear equation of the form A X = B. Where B and X are sparse matrices.
@@ -262,21 +623,133 @@ class UmfpackLU(object):
             Solution to the matrix equation as a csc_matrix
         """
         B = B.tocsc()
-        cols = list()
-        for j in xrange(B.shape[1]):
-            col = self.solve(B[:,j])
-            cols.append(csc_matrix(col))
-        return hstack(cols)
+        if B.dtype != self._A.dtype:
+            # Converted once for both paths below, like b in solve(): a complex
+            # B loses its imaginary part with a real A (ComplexWarning).
+            B = B.astype(self._A.dtype)
+        n, k = B.shape
+        if B.nnz >= 0.05 * n * k:
+            # Solve for all columns at once with a dense right-hand side.
+            return csc_matrix(self.solve(B.toarray(order='F')))
+
+        # Very sparse B: solve only the nonempty columns and assemble the
+        # CSC arrays of X directly.
+        if n != self._A.shape[1]:
+            raise ValueError("Shape of b is not compatible with that of A")
+        b = np.zeros((n,), dtype=self._A.dtype)
+        indptr = np.zeros((k + 1,), dtype=np.intp)
+        indices = []
+        data = []
+        for j in range(k):
+            i0, i1 = B.indptr[j], B.indptr[j + 1]
+            if i0 < i1:
+                b[:] = 0
+                np.add.at(b, B.indices[i0:i1], B.data[i0:i1])
+                x = self.solve(b)
+                nz = np.flatnonzero(x)
+                indices.append(nz)
+                data.append(x[nz])
+                indptr[j + 1] = indptr[j] + nz.shape[0]
+            else:
+                indptr[j + 1] = indptr[j]
+
+        if indices:
+            indices = np.concatenate(indices)
+            data = np.concatenate(data)
+        else:
+            indices = np.zeros((0,), dtype=np.intp)
+            data = np.zeros((0,), dtype=self._A.dtype)
+        return csc_matrix((data, indices, indptr), shape=(self._A.shape[0], k))
+
+    def reconstruct(self):
+        """
+        Reassemble the factorized matrix from the LU decomposition.
+
+        Returns
+        -------
+        A : scipy.sparse.csc_matrix
+            The matrix ``R * Pr.T * (L * U) * Pc.T``, equal to the original
+            matrix up to rounding errors.
+
+        Notes
+        -----
+        The permutations and row scalings are applied to the indices and
+        values of ``L * U`` directly, without forming the permutation and
+        scaling matrices.
+
+        """
+        self._compute_lu()
+        LU = (self._L * self._U).tocoo()
+
+        row = _invert_permutation(self._P)[LU.row]
+        col = _invert_permutation(self._Q)[LU.col]
+        data = LU.data * self._R[row]
+
+        return csc_matrix((data, (row, col)), shape=self._A.shape)
+
+    def refactorize(self, A, assume_sorted=False):
+        """
+        Factorize a new matrix with the same sparsity pattern as the current
+        one, reusing the symbolic factorization.
+
+        Parameters
+        ----------
+        A : csc_matrix or csr_matrix
+            Matrix to decompose, with the same shape, sparsity pattern and
+            value and index dtypes as the current one.
+        assume_sorted : bool, optional
+            If True, the indices of A are assumed to be sorted.
+
+        """
+        A, family = _prepare_matrix(A, assume_sorted)
+        if A.format == 'csr':
+            A = A.tocsc()
+        if family != self.umf.family or A.shape != self._A.shape:
+            raise ValueError('matrix type or shape differs from the '
+                             'factorized matrix')
+
+        with self._lock:
+            self.umf.refactorize(A)
+
+            self._A = A
+            self._L = None
+            self._U = None
+            self._P = None
+            self._Q = None
+            self._R = None
+
+    def close(self):
+        """
+        Free the factorization.
+
+        The UMFPACK context is kept for reuse by the factorizations created
+        afterwards in the same thread, which saves its setup. The object
+        cannot be used after calling this method.
+        """
+        with self._lock:
+            if self.umf is not None:
+                _release_context(self.umf)
+                self.umf = None
+                self._Wi = self._W = None
 
     def _compute_lu(self):
-        if self._L is None:
-            self._L, self._U, self._P, self._Q, self._R, do_recip = self.umf.lu(self._A)
-            if do_recip:
-                with np.errstate(divide='ignore'):
-                    np.reciprocal(self._R, out=self._R)
-
-            # Conform to scipy.sparse.splu convention on permutation matrices
-            self._P = self._P[self._P]
+        if self._L is not None:
+            return
+
+        with self._lock:
+            if self._L is None:
+                L, U, P, Q, R, do_recip = self.umf.lu(self._A)
+                if do_recip:
+                    with np.errstate(divide='ignore'):
+                        np.reciprocal(R, out=R)
+
+                # Conform to scipy.sparse.splu convention on permutation
+                # matrices: UMFPACK returns the inverse permutations.
+                self._U, self._R = U, R
+                self._P = _invert_permutation(P)
+                self._Q = _invert_permutation(Q)
+                # Set last, as it marks the factors as computed.
+                self._L = L
 
     @property
     def shape(self):
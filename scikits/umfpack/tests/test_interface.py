@@ -1,13 +1,16 @@
 from __future__ import division, print_function, absolute_import
 
+from concurrent.futures import ThreadPoolExecutor
 from packaging.version import Version
 import warnings
 import unittest
+from unittest import mock
 
 from numpy.testing import assert_allclose
 from numpy.linalg import norm as dense_norm
 
 import scipy
+import scipy.sparse
 from scipy.sparse import csc_array, csc_matrix, spdiags, SparseEfficiencyWarning
 from scipy.sparse import hstack
 
@@ -83,6 +86,20 @@ class TestSolvers(unittest.TestCase):
         x = um.spsolve(a, b)
         assert_allclose(a*x, self.b)
 
+    def test_solve_multiple_rhs(self):
+        # Solve with UMFPACK: block of rhs, with and without UmfpackLU
+        B = np.column_stack((self.b, self.b2))
+        for dtype in ('d', 'D'):
+            a = self.a.astype(dtype)
+            for factorize in (False, True):
+                X = um.spsolve(a, B, factorize=factorize)
+                assert X.shape == B.shape
+                assert_allclose(a*X, B)
+
+                x = um.spsolve(a, self.b[:,None], factorize=factorize)
+                assert x.shape == self.b.shape
+                assert_allclose(a*x, self.b)
+
     def test_splu_solve(self):
         # Prefactorize (with UMFPACK) matrix for solving with multiple rhs
         a = self.a.astype('d')
@@ -92,6 +109,7 @@ class TestSolvers(unittest.TestCase):
         assert_allclose(a*x1, self.b)
         x2 = lu.solve(self.b2)
         assert_allclose(a*x2, self.b2)
+        assert not hasattr(lu, '__dict__')
 
     @unittest.skipIf(_is_32bit_platform, reason="requires 64 bit platform")
     def test_splu_solve_int64(self):
@@ -105,6 +123,238 @@ class TestSolvers(unittest.TestCase):
         x2 = lu.solve(self.b2)
         assert_allclose(a*x2, self.b2)
 
+    def test_splu_reuse_symbolic(self):
+        # Factorize matrices with the same sparsity pattern, reusing the
+        # symbolic factorization
+        a = self.a.astype('d')
+        a2 = a.copy()
+        a2.data *= 2
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', um.UmfpackWarning)
+            lu = um.splu(a, reuse_symbolic=True)
+            lu2 = um.UmfpackLU(a2, reuse_symbolic=True)
+
+        assert lu.umf._symbolicOwner is lu2.umf._symbolicOwner
+        assert_allclose(a*lu.solve(self.b), self.b)
+        assert_allclose(a2*lu2.solve(self.b), self.b)
+
+        # Clearing the cache keeps the shared factorizations alive.
+        owner = lu.umf._symbolicOwner
+        um.clear_symbolic_cache()
+        lu3 = um.splu(a, reuse_symbolic=True)
+        assert lu3.umf._symbolicOwner is not owner
+        assert lu.umf._symbolicOwner is owner
+        assert_allclose(a*lu.solve(self.b), self.b)
+
+        # A cached factorization freed by its owner is not reused.
+        owner = lu3.umf._symbolicOwner
+        lu3.close()
+        owner.free()
+        lu4 = um.splu(a, reuse_symbolic=True)
+        assert lu4.umf._symbolicOwner is not owner
+        assert_allclose(a*lu4.solve(self.b), self.b)
+
+    def test_splu_ordering(self):
+        # Factorize with various fill-reducing orderings
+        a = self.a.astype('d')
+        for kwargs in ({'ordering': 'amd'}, {'ordering': 'best'},
+                       {'ordering': 'natural'}, {'ordering': 'rcm'},
+                       {'strategy': 'symmetric'},
+                       {'ordering': 'given', 'perm_c': [4, 3, 2, 1, 0]},
+                       {'perm_c': np.arange(5)}):
+            lu = um.splu(a, **kwargs)
+            assert_allclose(a*lu.solve(self.b), self.b)
+
+        self.assertRaises(ValueError, um.splu, a, ordering='foo')
+        self.assertRaises(ValueError, um.splu, a, strategy='foo')
+        self.assertRaises(ValueError, um.splu, a, ordering='given')
+        self.assertRaises(ValueError, um.splu, a, ordering='amd',
+                          perm_c=np.arange(5))
+        self.assertRaises(ValueError, um.splu, a, ordering='rcm',
+                          perm_c=np.arange(5))
+
+    def test_splu_no_copy(self):
+        # Sorted float64 CSC input is used as is
+        a = csc_matrix(self.a, dtype=np.float64)
+        a.sort_indices()
+        lu = um.splu(a, assume_sorted=True)
+        assert lu._A is a
+        assert_allclose(a*lu.solve(self.b), self.b)
+
+        # The indices are not scanned for sortedness.
+        for reuse_symbolic in (False, True):
+            with mock.patch.object(csc_matrix, 'has_sorted_indices',
+                                   new_callable=mock.PropertyMock) as sorted_:
+                lu = um.splu(a, reuse_symbolic=reuse_symbolic,
+                             assume_sorted=True)
+                assert not sorted_.called
+                assert_allclose(a*lu.solve(self.b), self.b)
+
+        # Integer input is upcast
+        lu = um.splu(csc_matrix(self.a, dtype=np.int32))
+        assert lu._A.dtype == np.float64
+        assert_allclose(a*lu.solve(self.b), self.b)
+
+    def test_splu_solve_multiple_rhs(self):
+        # Prefactorize (with UMFPACK) matrix and solve for a block of rhs
+        for dtype in ('d', 'D'):
+            a = self.a.astype(dtype)
+            lu = um.splu(a)
+
+            B = np.column_stack((self.b, self.b2))
+            X = lu.solve(B)
+            assert X.shape == B.shape
+            assert_allclose(a*X, B)
+
+            X = lu.solve(B, method='triangular')
+            assert X.shape == B.shape
+            assert_allclose(a*X, B)
+            assert_allclose(a*lu.solve(self.b, method='triangular'), self.b)
+
+    def test_solve_refinement_steps(self):
+        # Solve with UMFPACK without iterative refinement
+        a = self.a.astype('d')
+        for factorize in (False, True):
+            x = um.spsolve(a, self.b, factorize=factorize,
+                           refinement_steps=0)
+            assert_allclose(a*x, self.b)
+
+        lu = um.splu(a)
+        irstep = lu.umf.control[um.UMFPACK_IRSTEP]
+        x = lu.solve(self.b, refinement_steps=0)
+        assert_allclose(a*x, self.b)
+        assert lu.umf.info[um.UMFPACK_IR_TAKEN] == 0
+        assert lu.umf.control[um.UMFPACK_IRSTEP] == irstep
+
+    def test_splu_solve_check_cond(self):
+        # The condition number check can be switched off
+        lu = um.splu(self.a.astype('d'))
+        lu.umf.maxCond = 1.0
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', um.UmfpackWarning)
+            self.assertRaises(um.UmfpackWarning, lu.solve, self.b)
+            x = lu.solve(self.b, check_cond=False)
+        assert_allclose(self.a*x, self.b)
+
+    def test_splu_solve_threads(self):
+        # Concurrent solves with one factorization give correct results
+        n = 400
+        a = (scipy.sparse.random(n, n, density=0.02, random_state=0)
+             + 10.0 * scipy.sparse.eye(n)).tocsc()
+        lu = um.splu(a)
+        rng = np.random.RandomState(0)
+        bs = [rng.rand(n, 3) for ii in range(16)]
+
+        def solve(b):
+            return [lu.solve(b) for ii in range(20)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(solve, bs))
+
+        for b, xs in zip(bs, results):
+            for x in xs:
+                assert_allclose(a*x, b, atol=1e-12)
+
+    def test_splu_solve_output_dtype(self):
+        # Solve single precision rhs with the double precision factors
+        a = self.a.astype('d')
+        lu = um.splu(a)
+
+        b = self.b.astype(np.float32)
+        x = lu.solve(b)
+        assert x.dtype == np.float64
+        assert_allclose(a*x, self.b)
+
+        x = lu.solve(b, output_dtype=np.float32)
+        assert x.dtype == np.float32
+        assert_allclose(a*x, self.b, rtol=1e-5)
+
+    def test_splu_solve_trans(self):
+        # Solve transposed systems, for CSC and CSR input
+        a = csc_matrix([[1,2,0,4],[1,0,0,1],[1,0,2,1],[2,2,1,0.]])
+        b = np.arange(1.0, 5.0)
+        for A in (a, a + 1j*a.T, (a + 1j*a.T).tocsr()):
+            lu = um.splu(A)
+            assert lu._A.format == 'csc'
+            assert_allclose(A*lu.solve(b), b)
+            assert_allclose(A.T*lu.solve(b, trans='T'), b)
+            assert_allclose(A.conj().T*lu.solve(b, trans='H'), b)
+
+        self.assertRaises(ValueError, lu.solve, b, trans='X')
+        self.assertRaises(ValueError, lu.solve, b, method='triangular',
+                          trans='T')
+
+    def test_splu_refactorize(self):
+        # Factorize new values, keeping the symbolic factorization
+        a = csc_matrix(self.a, dtype=np.float64)
+        lu = um.splu(a)
+        symbolic = lu.umf._symbolic
+
+        a2 = a.copy()
+        a2.data += 1.0
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            lu.refactorize(a2)
+        assert lu.umf._symbolic is symbolic
+        assert_allclose(a2*lu.solve(self.b), self.b)
+        assert_allclose(lu.reconstruct().toarray(), a2.toarray(), atol=1e-13)
+
+        self.assertRaises(ValueError, lu.refactorize, a.astype('D'))
+        a3 = a + scipy.sparse.eye(5, k=-1)
+        self.assertRaises(RuntimeError, lu.refactorize, a3)
+
+    def test_splu_close(self):
+        # Closed factorizations give their context to new ones
+        a = self.a.astype('d')
+        lu = um.splu(a, ordering='natural')
+        umf = lu.umf
+        maxCond = umf.maxCond
+        umf.maxCond = 1.0
+        lu.close()
+        lu.close()
+        assert lu.umf is None
+
+        lu = um.splu(a)
+        assert lu.umf is umf
+        assert lu.umf.control[um.UMFPACK_ORDERING] != um.UMFPACK_ORDERING_NONE
+        assert lu.umf.maxCond == maxCond
+        assert_allclose(a*lu.solve(self.b), self.b)
+
+    def test_splu_get_solver(self):
+        # Solve repeatedly with preallocated buffers
+        for dtype in ('d', 'D'):
+            a = self.a.astype(dtype)
+            lu = um.splu(a)
+
+            solve = lu.get_solver()
+            for b in (self.b, self.b2, self.b[:,None]):
+                x = solve(b)
+                assert x.shape == b.shape
+                assert_allclose(a*x, b)
+
+            solve = lu.get_solver(nrhs=2)
+            B = np.column_stack((self.b, self.b2))
+            X = np.empty(B.shape, dtype=a.dtype)
+            assert solve(B, out=X) is X
+            assert_allclose(a*X, B)
+            self.assertRaises(ValueError, solve, self.b)
+
+            # The solver follows refactorize().
+            a2 = csc_matrix(a) * 2.0
+            lu.refactorize(a2)
+            assert_allclose(a2*solve(B), B)
+
+    def test_splu_solve_triangular(self):
+        A = csc_matrix([[1,2,0,4],[1,0,0,1],[1,0,2,1],[2,2,1,0.]])
+        lu = um.splu(A)
+
+        B = np.arange(12.0).reshape(4, 3)
+        assert_allclose(A*lu.solve(B, method='triangular'), B, atol=1e-13)
+        self.assertRaises(ValueError, lu.solve, B, method='foo')
+        self.assertRaises(ValueError, lu.solve, B, method='triangular',
+                          refinement_steps=0)
+
     def test_splu_solve_sparse(self):
         # Prefactorize (with UMFPACK) matrix for solving with multiple rhs
         A = self.a.astype('d')
@@ -118,24 +368,63 @@ class TestSolvers(unittest.TestCase):
         assert dense_norm(((A*X) - B).todense()) < 2e-14
         assert_allclose((A*X).todense(), B.todense())
 
+    def test_splu_solve_sparse_wide(self):
+        # Very sparse rhs with many (partly empty) columns
+        A = self.a.astype('d')
+        lu = um.splu(A)
+
+        B = csc_matrix(([1.0, 2.0, 3.0], ([0, 4, 2], [3, 17, 17])),
+                       shape=(5, 40))
+        X = lu.solve_sparse(B)
+        assert X.shape == B.shape
+        assert_allclose(X.toarray(), lu.solve(B.toarray()))
+        assert_allclose((A*X).toarray(), B.toarray(), atol=1e-14)
+
+        # A complex B is handled alike by the sparse and the dense path.
+        for B in (csc_matrix(([1.0+1j, 2.0], ([0, 4], [3, 17])),
+                             shape=(5, 40)),
+                  csc_matrix(np.full((5, 2), 1.0+1j))):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', np.ComplexWarning)
+                X = lu.solve_sparse(B)
+            assert_allclose((A*X).toarray(), B.real.toarray(), atol=1e-14)
+
     def test_splu_lu(self):
         A = csc_matrix([[1,2,0,4],[1,0,0,1],[1,0,2,1],[2,2,1,0.]])
 
         lu = um.splu(A)
 
-        Pr = np.zeros((4, 4))
-        Pr[lu.perm_r, np.arange(4)] = 1
-        Pr = csc_matrix(Pr)
-        Pc = np.zeros((4, 4))
-        Pc[np.arange(4), lu.perm_c] = 1
-        Pc = csc_matrix(Pc)
+        n = 4
+        ones = np.ones(n)
+        Pr = csc_matrix((ones, (lu.perm_r, np.arange(n))), shape=(n, n))
+        Pc = csc_matrix((ones, (np.arange(n), lu.perm_c)), shape=(n, n))
+        R = csc_matrix((lu.R, (np.arange(n), np.arange(n))), shape=(n, n))
+
+        A2 = (R * Pr.T * (lu.L * lu.U) * Pc.T).toarray()
+
+        assert_allclose(A2, A.toarray(), atol=1e-13)
+        assert_allclose(lu.reconstruct().toarray(), A.toarray(), atol=1e-13)
 
-        R = csc_matrix((4, 4))
-        R.setdiag(lu.R)
+    def test_splu_lu_random(self):
+        # Permutations that are neither involutions nor 3-cycles
+        rng = np.random.RandomState(1)
+        n = 30
+        A = csc_matrix(scipy.sparse.random(n, n, density=0.2,
+                                           random_state=rng)
+                       + 0.01 * scipy.sparse.eye(n))
+
+        lu = um.splu(A)
+
+        Pr = csc_matrix((np.ones(n), (lu.perm_r, np.arange(n))))
+        Pc = csc_matrix((np.ones(n), (np.arange(n), lu.perm_c)))
+        R = csc_matrix((lu.R, (np.arange(n), np.arange(n))))
 
         A2 = (R * Pr.T * (lu.L * lu.U) * Pc.T).toarray()
 
         assert_allclose(A2, A.toarray(), atol=1e-13)
+        assert_allclose(lu.reconstruct().toarray(), A.toarray(), atol=1e-13)
+        assert_allclose(A*lu.solve(self.b.repeat(6), method='triangular'),
+                        self.b.repeat(6))
 
 
 @unittest.skipIf(Version(scipy.__version__) >= Version("1.13"), "Needs to fix deprecation")
@@ -237,19 +526,16 @@ class TestSolversWithArrays(unittest.TestCase):
 
         lu = um.splu(A)
 
-        Pr = np.zeros((4, 4))
-        Pr[lu.perm_r, np.arange(4)] = 1
-        Pr = csc_array(Pr)
-        Pc = np.zeros((4, 4))
-        Pc[np.arange(4), lu.perm_c] = 1
-        Pc = csc_array(Pc)
-
-        R = csc_array((4, 4))
-        R.setdiag(lu.R)
+        n = 4
+        ones = np.ones(n)
+        Pr = csc_array((ones, (lu.perm_r, np.arange(n))), shape=(n, n))
+        Pc = csc_array((ones, (np.arange(n), lu.perm_c)), shape=(n, n))
+        R = csc_array((lu.R, (np.arange(n), np.arange(n))), shape=(n, n))
 
         A2 = (R @ Pr.T @ (lu.L @ lu.U) @ Pc.T).toarray()
 
         assert_allclose(A2, A.toarray(), atol=1e-13)
+        assert_allclose(lu.reconstruct().toarray(), A.toarray(), atol=1e-13)
 
 if __name__ == "__main__":
     unittest.main()
@@ -5,6 +5,8 @@
 from __future__ import division, print_function, absolute_import
 
 import random
+import subprocess
+import sys
 import unittest
 import warnings
 
@@ -126,6 +128,243 @@ class TestScipySolvers(_DeprecationAccept):
         _DeprecationAccept.setUp(self)
 
 
+class TestImport(unittest.TestCase):
+    """Tests the lazy loading of the package contents"""
+
+    def test_lazy_import(self):
+        code = ('import sys; import scikits.umfpack as um; '
+                'assert "scikits.umfpack.umfpack" not in sys.modules; '
+                'um.UmfpackLU; um.UMFPACK_A')
+        subprocess.check_call([sys.executable, '-c', code])
+
+    def test_namespace(self):
+        for name in ('spsolve', 'splu', 'UmfpackLU', 'UmfpackContext',
+                     'UMFPACK_A', 'umfpack', 'interface'):
+            assert name in um.__all__
+            assert name in dir(um)
+            assert hasattr(um, name)
+        assert um.UmfpackContext is um.umfpack.UmfpackContext
+        assert not hasattr(um, 'no_such_name')
+        assert not hasattr(um, 'importlib')
+        for name in ('importlib', '_import', '_submodules'):
+            assert name not in dir(um)
+
+
+class TestContextSolve(_DeprecationAccept):
+    """Tests solving with UmfpackContext directly"""
+
+    def test_solve_workspace(self):
+        # Solve reusing preallocated workspace arrays
+        for family, A in (('di', self.a), ('zi', self.a.astype('D')),
+                          ('dl', _to_int64(self.a)),
+                          ('zl', _to_int64(self.a.astype('D')))):
+            if family[1] == 'l' and _is_32bit_platform:
+                continue
+            umfpack = um.UmfpackContext(family)
+            umfpack.numeric(A)
+            Wi, W = umfpack.workspace(A.shape[0])
+
+            for b in (self.b, self.b2):
+                x = umfpack.solve(um.UMFPACK_A, A, b, Wi=Wi, W=W)
+                assert_array_almost_equal(A*x, b)
+
+    def test_solve_raw(self):
+        # Solve with pre-validated arrays, complex ones in the packed format
+        for family, A in (('di', self.a), ('zi', self.a.astype('D'))):
+            umfpack = um.UmfpackContext(family)
+            umfpack.numeric(A)
+            Wi, W = umfpack.workspace(A.shape[0])
+
+            b = self.b.astype(A.dtype)
+            x = np.empty_like(b)
+            data, xv, bv = (v.view(np.float64) for v in (A.data, x, b))
+            for ws in ((None, None), (Wi, W)):
+                x[:] = 0.0
+                status = umfpack.solve_raw(um.UMFPACK_A, A.indptr, A.indices,
+                                           data, xv, bv, *ws)
+                assert status == um.UMFPACK_OK
+                umfpack.check_status(status, x)
+                assert_array_almost_equal(A*x, b)
+
+        self.assertRaises(RuntimeError, umfpack.check_status,
+                          um.UMFPACK_ERROR_invalid_system, x)
+
+    def test_solve_check_cond(self):
+        # A singular matrix warns about its condition, unless switched off
+        A = csc_matrix(np.array([[1.0, 2.0], [2.0, 4.0]]))
+        b = np.ones(2)
+        umfpack = um.UmfpackContext('di')
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            umfpack.numeric(A)
+            umfpack.solve(um.UMFPACK_A, A, b, check_cond=False)
+            B = np.column_stack((b, b))
+            umfpack.solve_batch(um.UMFPACK_A, A, B, check_cond=False)
+            umfpack.solve_many(um.UMFPACK_A, A, B, check_cond=False)
+            assert not any('singular matrix!' in str(x.message) for x in w)
+
+            umfpack.solve(um.UMFPACK_A, A, b)
+            assert any('singular matrix!' in str(x.message) for x in w)
+            assert not any(issubclass(x.category, RuntimeWarning) for x in w)
+
+    def test_solve_many(self):
+        # Solve for several rhs at once, in parallel threads or not
+        B = np.column_stack((self.b, self.b2, self.b + self.b2))
+        for family, A in (('di', self.a), ('zi', self.a.astype('D')),
+                          ('dl', _to_int64(self.a)),
+                          ('zl', _to_int64(self.a.astype('D')))):
+            if family[1] == 'l' and _is_32bit_platform:
+                continue
+            umfpack = um.UmfpackContext(family)
+            umfpack.numeric(A)
+
+            X = umfpack.solve_many(um.UMFPACK_A, A, B, max_workers=2)
+            assert X.shape == B.shape
+            assert_array_almost_equal(A*X, B)
+
+            X = umfpack.solve_batch(um.UMFPACK_A, A, B)
+            assert X.shape == B.shape
+            assert_array_almost_equal(A*X, B)
+            assert_array_almost_equal(X[:,1],
+                                      umfpack.solve(um.UMFPACK_A, A, self.b2))
+
+        self.assertRaises(ValueError, umfpack.solve_many, um.UMFPACK_A, A,
+                          self.b)
+        self.assertRaises(ValueError, umfpack.solve_batch, um.UMFPACK_A, A,
+                          self.b)
+
+    def test_symbolic_ordering(self):
+        # Symbolic factorization with orderings given by name
+        for kwargs in ({'ordering': 'natural'}, {'ordering': 'rcm'},
+                       {'ordering': 'given', 'Qinit': [4, 3, 2, 1, 0]}):
+            umfpack = um.UmfpackContext('di')
+            ordering = umfpack.control[um.UMFPACK_ORDERING]
+            umfpack.symbolic(self.a, **kwargs)
+            assert umfpack.control[um.UMFPACK_ORDERING] == ordering
+
+            umfpack.numeric(self.a)
+            x = umfpack.solve(um.UMFPACK_A, self.a, self.b)
+            assert_array_almost_equal(self.a*x, self.b)
+
+        self.assertRaises(ValueError, umfpack.symbolic, self.a, ordering='foo')
+        self.assertRaisesRegex(ValueError, "ordering 'given' requires Qinit",
+                               umfpack.symbolic, self.a, ordering='given')
+        self.assertRaisesRegex(ValueError, "Qinit requires ordering 'given'",
+                               umfpack.symbolic, self.a,
+                               Qinit=np.arange(5), ordering='amd')
+
+    def test_free_numeric_keeps_symbolic(self):
+        # Refactorizing after free_numeric() reuses the symbolic object
+        umfpack = um.UmfpackContext('di')
+        umfpack.numeric(self.a)
+        symbolic = umfpack._symbolic
+
+        umfpack.free_numeric()
+        assert umfpack._numeric is None
+        assert umfpack._symbolic is symbolic
+
+        umfpack.refactorize(self.a)
+        x = umfpack.solve(um.UMFPACK_A, self.a, self.b)
+        assert_array_almost_equal(self.a*x, self.b)
+
+        umfpack.free()
+        assert umfpack._symbolic is None
+
+    def test_lu_reuses_numeric(self):
+        # lu() after numeric() of the same CSC matrix does not refactorize
+        umfpack = um.UmfpackContext('di')
+        umfpack.numeric(self.a)
+        numeric = umfpack._numeric
+
+        L, U, P, Q, R, do_recip = umfpack.lu(self.a)
+        assert umfpack._numeric is numeric
+
+        # A CSR matrix is factorized in CSC format.
+        umfpack.lu(self.a.tocsr())
+        assert umfpack.mtx.format == 'csc'
+
+    def test_lu_out(self):
+        # lu() with out= stores the factors in the arrays of a previous result
+        for family, A in (('di', self.a), ('zi', self.a.astype('D'))):
+            umfpack = um.UmfpackContext(family)
+            out = umfpack.lu(A)
+            A2 = A * 2.0
+            lu = um.UmfpackContext(family).lu(A2)
+
+            lu2 = umfpack.lu(A2, out=out)
+            for ii in (0, 1):
+                assert np.shares_memory(lu2[ii].data, out[ii].data)
+                assert_array_almost_equal(lu2[ii].toarray(), lu[ii].toarray())
+            for ii in (2, 3, 4):
+                assert lu2[ii] is out[ii]
+                assert_array_almost_equal(lu2[ii], lu[ii])
+
+    def test_call_keep_factors(self):
+        # Repeated calls with the same matrix factorize it once
+        umfpack = um.UmfpackContext('di')
+        x = umfpack(um.UMFPACK_A, self.a, self.b, keep_factors=True)
+        assert_array_almost_equal(self.a*x, self.b)
+        numeric = umfpack._numeric
+        assert numeric is not None
+
+        x = umfpack(um.UMFPACK_A, self.a, self.b2, keep_factors=True)
+        assert_array_almost_equal(self.a*x, self.b2)
+        assert umfpack._numeric is numeric
+
+        a = self.a * 2.0
+        x = umfpack(um.UMFPACK_A, a, self.b)
+        assert_array_almost_equal(a*x, self.b)
+        assert umfpack._numeric is None
+
+    def test_solve_readonly_rhs(self):
+        # Read-only and non-contiguous right-hand sides are copied
+        umfpack = um.UmfpackContext('di')
+        umfpack.numeric(self.a)
+
+        b = self.b.copy()
+        b.flags.writeable = False
+        x = umfpack.solve(um.UMFPACK_A, self.a, b)
+        assert_array_almost_equal(self.a*x, self.b)
+
+        b = np.column_stack((self.b, self.b2))[:,0]
+        x = umfpack.solve(um.UMFPACK_A, self.a, b)
+        assert_array_almost_equal(self.a*x, self.b)
+
+    def test_replaced_indices(self):
+        # Validation of a matrix is redone when its arrays are replaced
+        umfpack = um.UmfpackContext('di')
+        a = self.a.copy()
+        umfpack.numeric(a)
+        x = umfpack.solve(um.UMFPACK_A, a, self.b)
+        assert_array_almost_equal(a*x, self.b)
+
+        a.indices = a.indices.astype(np.int64)
+        self.assertRaises(ValueError, umfpack.solve, um.UMFPACK_A, a, self.b)
+
+    def test_solve_wrong_sys(self):
+        umfpack = um.UmfpackContext('di')
+        umfpack.numeric(self.a)
+
+        self.assertRaises(ValueError, umfpack.solve, -1, self.a, self.b)
+        self.assertRaises(ValueError, umfpack.linsolve, -1, self.a, self.b)
+
+    def test_solve_wrong_workspace(self):
+        umfpack = um.UmfpackContext('di')
+        umfpack.numeric(self.a)
+        Wi, W = umfpack.workspace(self.a.shape[0] - 1)
+
+        self.assertRaises(ValueError, umfpack.solve, um.UMFPACK_A, self.a,
+                          self.b, Wi=Wi, W=W)
+
+    def setUp(self):
+        self.a = csc_matrix(spdiags([[1, 2, 3, 4, 5], [6, 5, 8, 9, 10]],
+                                    [0, 1], 5, 5), dtype=np.float64)
+        self.b = np.array([1, 2, 3, 4, 5], dtype=np.float64)
+        self.b2 = np.array([5, 4, 3, 2, 1], dtype=np.float64)
+
+        _DeprecationAccept.setUp(self)
+
+
 class TestFactorization(_DeprecationAccept):
     """Tests factorizing a sparse linear system"""
 
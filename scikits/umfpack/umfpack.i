@@ -122,6 +122,23 @@ PyArrayObject *helper_getCArrayObject( PyObject *input, int type,
   Py_DECREF( obj ); \
 };
 
+/*!
+  Like ARRAY_IN, but None is passed as NULL. Used for the imaginary parts of
+  complex arrays, which are NULL for arrays in the packed complex format.
+*/
+#define ARRAY_IN_OPT( rtype, ctype, atype ) \
+%typemap( in ) (ctype *optarray) { \
+  PyArrayObject *obj; \
+  if ($input == Py_None) { \
+    $1 = NULL; \
+  } else { \
+    obj = helper_getCArrayObject( $input, NPY_##atype, 1, 1 ); \
+    if (!obj) return NULL; \
+    $1 = (rtype *) obj->data; \
+    Py_DECREF( obj ); \
+  } \
+};
+
 /*!
   @par Revision history:
   - 30.11.2005, c
@@ -174,27 +191,34 @@ PyArrayObject *helper_getCArrayObject( PyObject *input, int type,
 ARRAY_IN( int, const int, INT )
 %apply const int *array {
     const int Ap [ ],
-    const int Ai [ ]
+    const int Ai [ ],
+    const int Qinit [ ]
 };
 
 ARRAY_IN( long, const long, LONG )
 %apply const long *array {
     const long Ap [ ],
-    const long Ai [ ]
+    const long Ai [ ],
+    const long Qinit [ ]
 };
 
 ARRAY_IN( SuiteSparse_long, const SuiteSparse_long, INT64 )
 %apply const SuiteSparse_long *array {
     const SuiteSparse_long Ap [ ],
-    const SuiteSparse_long Ai [ ]
+    const SuiteSparse_long Ai [ ],
+    const SuiteSparse_long Qinit [ ]
 };
 
 ARRAY_IN( double, const double, DOUBLE )
 %apply const double *array {
     const double Ax [ ],
-    const double Az [ ],
     const double B [ ],
-    const double Bx [ ],
+    const double Bx [ ]
+};
+
+ARRAY_IN_OPT( double, const double, DOUBLE )
+%apply const double *optarray {
+    const double Az [ ],
     const double Bz [ ]
 };
 
@@ -202,9 +226,29 @@ ARRAY_IN( double, double, DOUBLE )
 %apply double *array {
     double X [ ],
     double Xx [ ],
+    double W [ ]
+};
+
+ARRAY_IN_OPT( double, double, DOUBLE )
+%apply double *optarray {
     double Xz [ ]
 };
 
+ARRAY_IN( int, int, INT )
+%apply int *array {
+    int Wi [ ]
+};
+
+ARRAY_IN( long, long, LONG )
+%apply long *array {
+    long Wi [ ]
+};
+
+ARRAY_IN( SuiteSparse_long, SuiteSparse_long, INT64 )
+%apply SuiteSparse_long *array {
+    SuiteSparse_long Wi [ ]
+};
+
 CONF_IN( UMFPACK_CONTROL )
 %apply (double conf [UMFPACK_CONTROL]) {
     double Control [ANY]
@@ -215,10 +259,37 @@ CONF_IN( UMFPACK_INFO )
     double Info [ANY]
 };
 
+/*!
+  Release the GIL while @a fun runs, so that other Python threads, e.g.
+  solving with other Numeric objects or right-hand sides, can run meanwhile.
+  The arguments are converted before, so no Python API is used in between.
+*/
+%define NOGIL( fun )
+%exception fun {
+  Py_BEGIN_ALLOW_THREADS
+  $action
+  Py_END_ALLOW_THREADS
+}
+%enddef
+
+%define NOGIL_FAMILIES( name )
+NOGIL( umfpack_di_ ## name )
+NOGIL( umfpack_dl_ ## name )
+NOGIL( umfpack_zi_ ## name )
+NOGIL( umfpack_zl_ ## name )
+%enddef
+
+NOGIL_FAMILIES( symbolic )
+NOGIL_FAMILIES( qsymbolic )
+NOGIL_FAMILIES( numeric )
+NOGIL_FAMILIES( solve )
+NOGIL_FAMILIES( wsolve )
+
 %include <umfpack.h>
 
 #if UMFPACK_MAIN_VERSION < 6
   %include <umfpack_solve.h>
+  %include <umfpack_wsolve.h>
   %include <umfpack_defaults.h>
   %include <umfpack_triplet_to_col.h>
   %include <umfpack_col_to_triplet.h>
@@ -243,6 +314,7 @@ OPAQUE_ARGOUT( void * )
 
 #if UMFPACK_MAIN_VERSION < 6
   %include <umfpack_symbolic.h>
+  %include <umfpack_qsymbolic.h>
   %include <umfpack_numeric.h>
 #endif
 
@@ -290,14 +362,17 @@ OPAQUE_ARGINOUT( void * )
 ARRAY_IN( double, double, DOUBLE )
 %apply double *array {
     double Lx [ ],
-    double Lz [ ],
     double Ux [ ],
-    double Uz [ ],
-    double Dx [ ],
-    double Dz [ ],
     double Rs [ ]
 };
 
+%apply double *optarray {
+    double Dx [ ],
+    double Lz [ ],
+    double Uz [ ],
+    double Dz [ ]
+};
+
 ARRAY_IN( int, int, INT )
 %apply int *array {
     int Lp [ ],
@@ -138,9 +138,12 @@ from __future__ import division, print_function, absolute_import
 
 import re
 import warnings
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import scipy.sparse as sp
+from scipy.sparse.csgraph import reverse_cuthill_mckee
 
 from . import _umfpack as _um
 
@@ -167,16 +170,14 @@ def configure(**kwargs):
 ##
 # 30.11.2005, c
 def updateDictWithVars(adict, module, pattern, group=None):
-    match = re.compile(pattern).match
+    match = re.compile(pattern).fullmatch
 
-    for name in [ii for ii in vars(module)
-                 if match(ii)]:
-        if group is not None:
-            outName = match(name).group(group)
-        else:
-            outName = name
+    for name, val in vars(module).items():
+        mm = match(name)
+        if mm is None:
+            continue
 
-        adict[outName] = module.__dict__[name]
+        adict[name if group is None else mm.group(group)] = val
 
     return adict
 
@@ -188,6 +189,7 @@ umfControls = [
     'UMFPACK_DENSE_COL',
     'UMFPACK_BLOCK_SIZE',
     'UMFPACK_STRATEGY',
+    'UMFPACK_ORDERING',
     'UMFPACK_2BY2_TOLERANCE',
     'UMFPACK_FIXQ',
     'UMFPACK_AMD_DENSE',
@@ -305,6 +307,16 @@ umfInfo = [
     'UMFPACK_ORDERING_GIVEN',
 ]
 
+
+def _strItems(names):
+    """
+    Return (format, index) pairs for printing the values of the named control
+    or info entries in aligned columns.
+    """
+    maxLen = max([len(name) for name in names])
+    return [('%-*s : %%d' % (maxLen, name), umfDefines[name])
+            for name in names if name in umfDefines]
+
 if _um:
     ##
     # Export UMFPACK constants from _um.
@@ -345,6 +357,7 @@ if _um:
         UMFPACK_Ut,
         UMFPACK_Uat,
     ]
+    _umfSysSet = frozenset(umfSys)
 
     # Real, complex.
     umfSys_transposeMap = [
@@ -355,10 +368,52 @@ if _um:
          UMFPACK_Aat: UMFPACK_A}
     ]
 
+    # Names of the UMFPACK_ORDERING values, see UmfpackContext.symbolic().
+    # Only the orderings defined by the UMFPACK version in use are available.
+    umfOrderings = dict((name, umfDefines['UMFPACK_ORDERING_' + suffix])
+                        for name, suffix in (('amd', 'AMD'),
+                                             ('cholmod', 'CHOLMOD'),
+                                             ('metis', 'METIS'),
+                                             ('best', 'BEST'),
+                                             ('natural', 'NONE'),
+                                             ('given', 'GIVEN'))
+                        if 'UMFPACK_ORDERING_' + suffix in umfDefines)
+
+    _controlItems = _strItems(umfControls)
+    _infoItems = _strItems(umfInfo)
+
 umfFamilyTypes = {'di': int, 'dl': int, 'zi': int, 'zl': int}
 umfRealTypes = ('di', 'dl')
 umfComplexTypes = ('zi', 'zl')
 
+# family -> (index dtype, value dtype) of matrices of the family.
+_familyDtypes = {
+    'di': (np.dtype(np.int32), np.dtype(np.float64)),
+    'dl': (np.dtype(np.int64), np.dtype(np.float64)),
+    'zi': (np.dtype(np.int32), np.dtype(np.complex128)),
+    'zl': (np.dtype(np.int64), np.dtype(np.complex128)),
+}
+
+# family -> {name: _um function}, filled on the first UmfpackContext(family).
+_familyFuns = {}
+
+def _packComplex(arr):
+    """
+    View a complex128 array as float64 array of interleaved real and
+    imaginary parts, the packed complex format of UMFPACK.
+    """
+    return np.ascontiguousarray(arr).view(np.float64)
+
+def _reuseArray(arr, n, dtype):
+    """
+    Return `arr` if it is a writeable C array of shape (n,) and `dtype`,
+    otherwise a new such array.
+    """
+    if ((arr is None) or (arr.shape != (n,)) or (arr.dtype != dtype)
+        or not arr.flags.carray):
+        arr = np.empty((n,), dtype=dtype)
+    return arr
+
 ##
 # 02.01.2005
 
@@ -372,15 +427,15 @@ class Struct(object):
 
     # 08.03.2005
     def __str__(self):
-        ss = "%s\n" % self.__class__
+        lines = ['%s' % self.__class__]
         for key, val in self.__dict__.items():
-            if (issubclass(self.__dict__[key].__class__, Struct)):
-                ss += "  %s:\n    %s\n" % (key, self.__dict__[key].__class__)
+            lines.append('  %s:' % key)
+            if isinstance(val, Struct):
+                # Nested structs, e.g. UmfpackContext.funs, are not expanded.
+                lines.append('    %s' % val.__class__)
             else:
-                aux = "\n" + str(val)
-                aux = aux.replace("\n", "\n    ")
-                ss += "  %s:\n%s\n" % (key, aux[1:])
-        return(ss.rstrip())
+                lines.extend('    ' + line for line in str(val).split('\n'))
+        return '\n'.join(lines).rstrip()
 
 ##
 # 30.11.2005, c
@@ -394,13 +449,22 @@ class UmfpackContext(Struct):
     -------
     __call__
     solve
+    solve_many
+    solve_batch
+    solve_raw
+    check_status
+    check_condition
     linsolve
     lu
+    workspace
     numeric
+    refactorize
     symbolic
     free
+    reset
     free_numeric
     free_symbolic
+    share_symbolic
     report_symbolic
     report_numeric
     report_control
@@ -414,6 +478,8 @@ class UmfpackContext(Struct):
         If estimated condition number is greater than maxCond,
         a warning is issued (default: 1e12)
     """
+    # Default of maxCond.
+    _maxCondDefault = 1e12
 
     ##
     # 30.11.2005, c
@@ -421,7 +487,7 @@ class UmfpackContext(Struct):
     # 21.12.2005
     # 01.03.2006
     def __init__(self, family='di', **kwargs):
-        self.maxCond = 1e12
+        self.maxCond = self._maxCondDefault
         Struct.__init__(self, **kwargs)
 
         if family not in umfFamilyTypes:
@@ -431,14 +497,22 @@ class UmfpackContext(Struct):
         self.control = np.zeros((UMFPACK_CONTROL,), dtype=np.double)
         self.info = np.zeros((UMFPACK_INFO,), dtype=np.double)
         self._symbolic = None
+        self._symbolicOwner = None
         self._numeric = None
         self.mtx = None
+        self._indxCache = None
         self.isReal = self.family in umfRealTypes
+        self._indexType, self._dataType = _familyDtypes[family]
+        # Systems for transposed matrices, used by solve(autoTranspose=True).
+        self._transposeMap = umfSys_transposeMap[0 if self.isReal else 1]
 
         ##
         # Functions corresponding to <family> are stored in self.funs.
-        pattern = 'umfpack_' + family + '_(.*)'
-        fn = updateDictWithVars({}, _um, pattern, group=1)
+        fn = _familyFuns.get(family)
+        if fn is None:
+            pattern = 'umfpack_' + family + '_(.*)'
+            fn = updateDictWithVars({}, _um, pattern, group=1)
+            _familyFuns[family] = fn
         self.funs = Struct(**fn)
 
         self.funs.defaults(self.control)
@@ -450,20 +524,14 @@ class UmfpackContext(Struct):
     ##
     # 30.11.2005, c
     def strControl(self):
-        maxLen = max([len(name) for name in umfControls])
-        format = '%%-%ds : %%d' % maxLen
-        aux = [format % (name, self.control[umfDefines[name]])
-               for name in umfControls if name in umfDefines]
-        return '\n'.join(aux)
+        return '\n'.join([format % self.control[ii]
+                          for format, ii in _controlItems])
 
     ##
     # 01.12.2005, c
     def strInfo(self):
-        maxLen = max([len(name) for name in umfInfo])
-        format = '%%-%ds : %%d' % maxLen
-        aux = [format % (name, self.info[umfDefines[name]])
-               for name in umfInfo if name in umfDefines]
-        return '\n'.join(aux)
+        return '\n'.join([format % self.info[ii]
+                          for format, ii in _infoItems])
 
     ##
     # 30.11.2005, c
@@ -472,6 +540,16 @@ class UmfpackContext(Struct):
     # 01.03.2006
     def _getIndx(self, mtx):
 
+        # The last validated matrix, checked by identity of the matrix and of
+        # its arrays, which may be replaced. Weak references do not keep them
+        # alive.
+        cache = self._indxCache
+        if ((cache is not None) and (cache[0]() is mtx)
+            and (cache[1]() is mtx.indptr) and (cache[2]() is mtx.indices)
+            and (cache[3]() is mtx.data)):
+            self.isCSR = cache[4]
+            return mtx.indices
+
         if (sp.isspmatrix_csc(mtx) or 
             (hasattr(sp, 'csc_array') and isinstance(mtx, sp.csc_array))):
             indx = mtx.indices
@@ -485,59 +563,122 @@ class UmfpackContext(Struct):
 
         ##
         # Should check types of indices to correspond to familyTypes.
-        if self.family[1] == 'i':
-            if (indx.dtype != np.dtype(np.int32)) \
-                   or mtx.indptr.dtype != np.dtype(np.int32):
-                raise ValueError('matrix must have int indices')
-        else:
-            if (indx.dtype != np.dtype(np.int64)) \
-                   or mtx.indptr.dtype != np.dtype(np.int64):
-                raise ValueError('matrix must have long indices')
+        if ((indx.dtype != self._indexType)
+            or (mtx.indptr.dtype != self._indexType)):
+            raise ValueError('matrix must have %s indices'
+                             % ('int' if self.family[1] == 'i' else 'long'))
 
-        if self.isReal:
-            if mtx.data.dtype != np.dtype(np.float64):
-                raise ValueError('matrix must have float64 values')
-        else:
-            if mtx.data.dtype != np.dtype(np.complex128):
-                raise ValueError('matrix must have complex128 values')
+        if mtx.data.dtype != self._dataType:
+            raise ValueError('matrix must have %s values' % self._dataType)
+
+        self._indxCache = (weakref.ref(mtx), weakref.ref(mtx.indptr),
+                           weakref.ref(indx), weakref.ref(mtx.data),
+                           self.isCSR)
 
         return indx
 
+    def _getData(self, mtx):
+        """
+        Return the matrix values as arguments of the UMFPACK functions.
+
+        Complex values are passed in the packed format, with the imaginary
+        part array set to NULL, so that they need not be split.
+        """
+        if self.isReal:
+            return (mtx.data,)
+        else:
+            return (_packComplex(mtx.data), None)
+
     ##
     # 30.11.2005, c
     # last revision: 10.01.2007
-    def symbolic(self, mtx):
+    def symbolic(self, mtx, Qinit=None, ordering=None, assume_sorted=False):
         """
         Perform symbolic object (symbolic LU decomposition) computation for a given
         sparsity pattern.
+
+        Parameters
+        ----------
+        mtx : scipy.sparse.csc_matrix or scipy.sparse.csr_matrix
+            Input.
+        Qinit : array_like, optional
+            Initial column permutation, used instead of the fill-reducing
+            ordering given by self.control[UMFPACK_ORDERING]. For a CSR
+            matrix, UMFPACK works with its transpose, so this is a row
+            permutation.
+        ordering : str, optional
+            Fill-reducing ordering used for this call instead of
+            self.control[UMFPACK_ORDERING]: one of the umfOrderings keys
+            ('given' requires `Qinit`), or 'rcm' to use the reverse
+            Cuthill-McKee ordering of the pattern of mtx + mtx.T as `Qinit`.
+        assume_sorted : bool, optional
+            If True, the indices of mtx are assumed to be sorted and are not
+            checked, like with configure(assumeSortedIndices=True).
         """
+        if ordering == 'rcm':
+            if Qinit is not None:
+                raise ValueError("Qinit cannot be used with ordering 'rcm'")
+            Qinit = reverse_cuthill_mckee(mtx, symmetric_mode=False)
+            ordering = None
+        elif ordering is not None:
+            if ordering not in umfOrderings:
+                raise ValueError('unknown ordering: %s' % ordering)
+            if (ordering == 'given') and (Qinit is None):
+                raise ValueError("ordering 'given' requires Qinit")
+            if (ordering != 'given') and (Qinit is not None):
+                raise ValueError("Qinit requires ordering 'given'")
+
         self.free_symbolic()
 
         indx = self._getIndx(mtx)
 
-        if not assumeSortedIndices:
+        control = self.control
+        if ordering is not None:
+            control = control.copy()
+            control[UMFPACK_ORDERING] = umfOrderings[ordering]
+
+        self._computeSymbolic(mtx, indx, Qinit, control, assume_sorted)
+
+    def _computeSymbolic(self, mtx, indx, Qinit=None, control=None,
+                         assume_sorted=False):
+        """
+        Compute the symbolic object of the validated matrix `mtx` with
+        indices `indx`, see symbolic().
+        """
+        if not (assume_sorted or assumeSortedIndices
+                or mtx.has_sorted_indices):
             # row/column indices cannot be assumed to be sorted
             mtx.sort_indices()
 
-        if self.isReal:
+        data = self._getData(mtx)
+
+        if control is None:
+            control = self.control
+
+        if Qinit is None:
+            fun = self.funs.symbolic
             status, self._symbolic\
-                    = self.funs.symbolic(mtx.shape[0], mtx.shape[1],
-                                          mtx.indptr,
-                                          indx,
-                                          mtx.data,
-                                          self.control, self.info)
+                    = fun(mtx.shape[0], mtx.shape[1],
+                          mtx.indptr,
+                          indx,
+                          *data,
+                          control, self.info)
         else:
-            real, imag = mtx.data.real.copy(), mtx.data.imag.copy()
+            Qinit = np.ascontiguousarray(Qinit, dtype=indx.dtype)
+            if Qinit.shape != (mtx.shape[1],):
+                raise ValueError('Qinit must have shape %s (has %s)'
+                                 % ((mtx.shape[1],), Qinit.shape))
+            fun = self.funs.qsymbolic
             status, self._symbolic\
-                    = self.funs.symbolic(mtx.shape[0], mtx.shape[1],
-                                          mtx.indptr,
-                                          indx,
-                                          real, imag,
-                                          self.control, self.info)
+                    = fun(mtx.shape[0], mtx.shape[1],
+                          mtx.indptr,
+                          indx,
+                          *data,
+                          Qinit,
+                          control, self.info)
 
         if status != UMFPACK_OK:
-            raise RuntimeError('%s failed with %s' % (self.funs.symbolic,
-                                                       umfStatus[status]))
+            raise RuntimeError('%s failed with %s' % (fun, umfStatus[status]))
 
     ##
     # 30.11.2005, c
@@ -557,42 +698,62 @@ class UmfpackContext(Struct):
             self.symbolic(mtx)
 
         indx = self._getIndx(mtx)
+        data = self._getData(mtx)
 
-        failCount = 0
-        while 1:
-            if self.isReal:
-                status, self._numeric\
-                        = self.funs.numeric(mtx.indptr, indx, mtx.data,
-                                             self._symbolic,
-                                             self.control, self.info)
-            else:
-                real, imag = mtx.data.real.copy(), mtx.data.imag.copy()
-                status, self._numeric\
-                        = self.funs.numeric(mtx.indptr, indx,
-                                             real, imag,
-                                             self._symbolic,
-                                             self.control, self.info)
-
-            if status != UMFPACK_OK:
-                if status == UMFPACK_WARNING_singular_matrix:
-                    warnings.warn('Singular matrix', UmfpackWarning)
-                    break
-                elif status in (UMFPACK_ERROR_different_pattern,
-                                UMFPACK_ERROR_invalid_Symbolic_object):
-                    # Try again.
-                    warnings.warn('Recomputing symbolic', UmfpackWarning)
-                    self.symbolic(mtx)
-                    failCount += 1
-                else:
-                    failCount += 100
-            else:
+        # At most two attempts: the symbolic object is recomputed once if it
+        # does not fit mtx.
+        for attempt in range(2):
+            status, self._numeric\
+                    = self.funs.numeric(mtx.indptr, indx, *data,
+                                         self._symbolic,
+                                         self.control, self.info)
+
+            if status == UMFPACK_OK:
+                break
+            elif status == UMFPACK_WARNING_singular_matrix:
+                warnings.warn('Singular matrix', UmfpackWarning)
                 break
-            if failCount >= 2:
+            elif ((attempt == 0)
+                  and (status in (UMFPACK_ERROR_different_pattern,
+                                  UMFPACK_ERROR_invalid_Symbolic_object))):
+                # Try again.
+                warnings.warn('Recomputing symbolic', UmfpackWarning)
+                self.free_symbolic()
+                self._computeSymbolic(mtx, indx)
+            else:
                 raise RuntimeError('%s failed with %s' % (self.funs.numeric,
                                                            umfStatus[status]))
 
         self.mtx = mtx
 
+    def refactorize(self, mtx):
+        """
+        Perform numeric object (LU decomposition) computation for a matrix
+        with the same sparsity pattern as the matrix passed to symbolic().
+
+        Unlike numeric(), the symbolic object is never recomputed, so that
+        it can be reused by repeated factorizations of matrices differing in
+        values only. RuntimeError is raised if the pattern differs.
+        """
+        if self._symbolic is None:
+            raise RuntimeError('symbolic() not called')
+
+        self.free_numeric()
+
+        indx = self._getIndx(mtx)
+        status, self._numeric\
+                = self.funs.numeric(mtx.indptr, indx, *self._getData(mtx),
+                                     self._symbolic,
+                                     self.control, self.info)
+
+        if status == UMFPACK_WARNING_singular_matrix:
+            warnings.warn('Singular matrix', UmfpackWarning)
+        elif status != UMFPACK_OK:
+            raise RuntimeError('%s failed with %s' % (self.funs.numeric,
+                                                       umfStatus[status]))
+
+        self.mtx = mtx
+
     ##
     # 14.12.2005, c
     def report_symbolic(self):
@@ -632,8 +793,34 @@ class UmfpackContext(Struct):
     def free_symbolic(self):
         """Free symbolic data"""
         if self._symbolic is not None:
-            self.funs.free_symbolic(self._symbolic)
+            if self._symbolicOwner is None:
+                self.funs.free_symbolic(self._symbolic)
             self._symbolic = None
+            self._symbolicOwner = None
+
+    def share_symbolic(self, other):
+        """
+        Use the symbolic object of another context instead of computing it.
+
+        The other context, which must have the same family and must have
+        called symbolic() for a matrix with the same sparsity pattern as the
+        matrices passed to numeric(), keeps owning the symbolic object: it
+        is kept alive while shared, and is not freed by this context. The
+        owner must not recompute or free its symbolic object while shared.
+        """
+        if other.family != self.family:
+            raise ValueError('family mismatch: %s != %s'
+                             % (other.family, self.family))
+        if other._symbolic is None:
+            raise RuntimeError('symbolic() not called')
+
+        self.free_numeric()
+        self.free_symbolic()
+        self._symbolic = other._symbolic
+        if other._symbolicOwner is None:
+            self._symbolicOwner = other
+        else:
+            self._symbolicOwner = other._symbolicOwner
 
     ##
     # 30.11.2005, c
@@ -652,13 +839,27 @@ class UmfpackContext(Struct):
         self.free_symbolic()
         self.free_numeric()
 
+    def reset(self):
+        """
+        Free all data and restore the default settings: the control
+        parameters, maxCond, and the info array.
+        """
+        self.free()
+        self.mtx = None
+        self._indxCache = None
+        self.maxCond = self._maxCondDefault
+        self.info.fill(0.0)
+        self.funs.defaults(self.control)
+        self.control[UMFPACK_PRL] = 3
+
     ##
     # 30.11.2005, c
     # 01.12.2005
     # 02.12.2005
     # 21.12.2005
     # 01.03.2006
-    def solve(self, sys, mtx, rhs, autoTranspose=False):
+    def solve(self, sys, mtx, rhs, autoTranspose=False, Wi=None, W=None,
+              check_cond=True):
         """
         Solution of system of linear equation using the Numeric object.
 
@@ -674,6 +875,13 @@ class UmfpackContext(Struct):
         autoTranspose : bool
             Automatically changes `sys` to the transposed type, if `mtx` is in CSR,
             since UMFPACK assumes CSC internally
+        Wi, W : ndarray, optional
+            Integer and double workspace arrays, see `workspace()`. If given,
+            UMFPACK's wsolve is used, so that repeated solves do not allocate
+            the workspace on each call.
+        check_cond : bool
+            If True, warn if the estimated condition number is greater than
+            self.maxCond.
 
         Returns
         -------
@@ -681,19 +889,237 @@ class UmfpackContext(Struct):
             Solution to the equation system.
 
         """
-        if sys not in umfSys:
-            raise ValueError('sys must be in' % umfSys)
+        sys, indx = self._checkSolve(sys, mtx, autoTranspose)
+        if W is not None:
+            self._checkWorkspace(mtx, indx, Wi, W)
+
+        # No copy if rhs already is a writeable C array of the value dtype.
+        rhs = np.require(rhs, self._dataType, 'CAW')
+        sol = np.empty((mtx.shape[1],), dtype=self._dataType)
+
+        args = (sys, mtx.indptr, indx) + self._getData(mtx)\
+               + self._getVectors(sol, rhs)\
+               + (self._numeric, self.control, self.info)
+        if W is None:
+            status = self.funs.solve(*args)
+        else:
+            status = self.funs.wsolve(*(args + (Wi, W)))
+
+        # self.funs.report_info( self.control, self.info )
+        # pause()
+        self.check_status(status, sol)
+        if check_cond:
+            self.check_condition()
+
+        return sol
+
+    def solve_many(self, sys, mtx, rhs, autoTranspose=False, max_workers=None,
+                   check_cond=True):
+        """
+        Solution of system of linear equation for each column of `rhs`, in
+        parallel threads.
+
+        The UMFPACK solve routines release the GIL, so that the columns are
+        solved concurrently using the Numeric object. self.info is not updated
+        by the solves.
+
+        Parameters
+        ----------
+        sys : constant
+            one of UMFPACK system description constants, like
+            UMFPACK_A, UMFPACK_At, see umfSys list and UMFPACK docs
+        mtx : scipy.sparse.csc_matrix or scipy.sparse.csr_matrix
+            Input.
+        rhs : ndarray
+            Right Hand Sides, a 2D array with a column per system.
+        autoTranspose : bool
+            Automatically changes `sys` to the transposed type, if `mtx` is in CSR,
+            since UMFPACK assumes CSC internally
+        max_workers : int, optional
+            Maximum number of threads, see concurrent.futures.ThreadPoolExecutor.
+        check_cond : bool
+            If True, warn if the estimated condition number is greater than
+            self.maxCond.
+
+        Returns
+        -------
+        sol : ndarray
+            Solutions to the equation systems, with the shape of `rhs`.
+
+        """
+        sys, indx = self._checkSolve(sys, mtx, autoTranspose)
+        rhs, sol = self._getBatch(mtx, rhs)
+
+        data = self._getData(mtx)
+
+        def solveColumn(j):
+            # Info is written by each solve, so it cannot be shared.
+            info = np.zeros((UMFPACK_INFO,), dtype=np.double)
+            vecs = self._getVectors(sol[:, j], rhs[:, j])
+            return self.funs.solve(sys, mtx.indptr, indx, *(data + vecs),
+                                   self._numeric, self.control, info)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            statuses = list(executor.map(solveColumn, range(rhs.shape[1])))
+
+        for j, status in enumerate(statuses):
+            self.check_status(status, sol[:, j])
+        if check_cond:
+            self.check_condition()
+
+        return sol
+
+    def solve_batch(self, sys, mtx, rhs, autoTranspose=False, Wi=None, W=None,
+                    check_cond=True, control=None):
+        """
+        Solution of system of linear equation for each column of `rhs`.
+
+        Unlike repeated calls of solve(), the arguments are checked, and the
+        solution array and the workspace are allocated, only once.
+
+        Parameters
+        ----------
+        sys : constant
+            one of UMFPACK system description constants, like
+            UMFPACK_A, UMFPACK_At, see umfSys list and UMFPACK docs
+        mtx : scipy.sparse.csc_matrix or scipy.sparse.csr_matrix
+            Input.
+        rhs : ndarray
+            Right Hand Sides, a 2D array with a column per system.
+        autoTranspose : bool
+            Automatically changes `sys` to the transposed type, if `mtx` is in CSR,
+            since UMFPACK assumes CSC internally
+        Wi, W : ndarray, optional
+            Integer and double workspace arrays, see `workspace()`. Allocated
+            if not given.
+        check_cond : bool
+            If True, warn if the estimated condition number is greater than
+            self.maxCond.
+        control : ndarray, optional
+            Control parameters used instead of self.control, e.g. a modified
+            copy of it, so that self.control is not changed.
+
+        Returns
+        -------
+        sol : ndarray
+            Solutions to the equation systems, with the shape of `rhs`.
+
+        """
+        sys, indx = self._checkSolve(sys, mtx, autoTranspose)
+        if W is None:
+            Wi, W = self.workspace(mtx.shape[1])
+        else:
+            self._checkWorkspace(mtx, indx, Wi, W)
+        rhs, sol = self._getBatch(mtx, rhs)
+        if control is None:
+            control = self.control
+        else:
+            control = np.require(control, np.float64, 'CAW')
+
+        args = (sys, mtx.indptr, indx) + self._getData(mtx)
+        wsolve = self.funs.wsolve
+        for j in range(rhs.shape[1]):
+            status = wsolve(*(args + self._getVectors(sol[:, j], rhs[:, j])),
+                            self._numeric, control, self.info, Wi, W)
+            self.check_status(status, sol[:, j])
+        if check_cond:
+            self.check_condition()
+
+        return sol
+
+    def solve_raw(self, sys, indptr, indices, data, sol, rhs, Wi=None, W=None):
+        """
+        Solution of system of linear equation using the Numeric object,
+        without any checks of the arguments.
+
+        Meant for callers solving many times in a tight loop, which have
+        validated the arguments once, e.g. with solve(). The contract is:
+
+        - `sys` is in umfSys and numeric() was called for the matrix given
+          by `indptr`, `indices` and `data`, in CSC format.
+        - `indptr` and `indices` are C-contiguous, writeable arrays of the
+          family index type (int32 for 'di', 'zi', int64 for 'dl', 'zl').
+        - `data`, `sol` and `rhs` are C-contiguous, writeable float64 arrays.
+          For the complex families, they hold the complex values in the
+          packed format, i.e. a complex128 array viewed as float64.
+        - `Wi`, `W` are None, or the arrays returned by workspace().
+
+        Arrays breaking the contract may crash the interpreter.
+
+        Parameters
+        ----------
+        sys : constant
+            one of UMFPACK system description constants, like
+            UMFPACK_A, UMFPACK_At, see umfSys list and UMFPACK docs
+        indptr, indices, data : ndarray
+            The CSC matrix.
+        sol : ndarray
+            Output, the solution.
+        rhs : ndarray
+            Right Hand Side
+        Wi, W : ndarray, optional
+            Integer and double workspace arrays, see `workspace()`.
+
+        Returns
+        -------
+        status : int
+            The UMFPACK status, UMFPACK_OK on success, see check_status().
+            self.info is updated.
+
+        """
+        if self.isReal:
+            args = (sys, indptr, indices, data, sol, rhs)
+        else:
+            args = (sys, indptr, indices, data, None, sol, None, rhs, None)
+        args += (self._numeric, self.control, self.info)
+
+        if W is None:
+            return self.funs.solve(*args)
+        else:
+            return self.funs.wsolve(*(args + (Wi, W)))
+
+    def _getVectors(self, sol, rhs):
+        """
+        Return the solution and right-hand side vectors as arguments of the
+        UMFPACK solve functions, complex ones in the packed format.
+        """
+        if self.isReal:
+            return (sol, rhs)
+        else:
+            return (_packComplex(sol), None, _packComplex(rhs), None)
+
+    def _getBatch(self, mtx, rhs):
+        """
+        Return the 2D `rhs` as a Fortran array with contiguous columns, and
+        an empty solution array of the same layout.
+        """
+        rhs = np.require(rhs, self._dataType, 'FAW')
+        if (rhs.ndim != 2) or (rhs.shape[0] != mtx.shape[0]):
+            raise ValueError('rhs must have shape (%d, k)' % mtx.shape[0])
+        sol = np.empty((mtx.shape[1], rhs.shape[1]), dtype=self._dataType,
+                       order='F')
+
+        return rhs, sol
+
+    def _checkWorkspace(self, mtx, indx, Wi, W):
+        n_w = (5 if self.isReal else 10) * mtx.shape[1]
+        if ((Wi.dtype != indx.dtype) or (Wi.shape != (mtx.shape[1],))
+            or (W.dtype != np.float64) or (W.shape != (n_w,))):
+            raise ValueError('wrong workspace arrays, use workspace()')
+
+    def _checkSolve(self, sys, mtx, autoTranspose):
+        """
+        Check the arguments of solve() and return the UMFPACK system to solve
+        and the matrix indices.
+        """
+        if sys not in _umfSysSet:
+            raise ValueError('sys must be in %s (got %s)' % (umfSys, sys))
 
         if autoTranspose and self.isCSR:
             ##
             # UMFPACK uses CSC internally...
-            if self.family in umfRealTypes:
-                ii = 0
-            else:
-                ii = 1
-            if sys in umfSys_transposeMap[ii]:
-                sys = umfSys_transposeMap[ii][sys]
-            else:
+            sys = self._transposeMap.get(sys)
+            if sys is None:
                 raise RuntimeError('autoTranspose ambiguous, switch it off')
 
         if self._numeric is not None:
@@ -702,26 +1128,14 @@ class UmfpackContext(Struct):
         else:
             raise RuntimeError('numeric() not called')
 
-        indx = self._getIndx(mtx)
-
-        if self.isReal:
-            rhs = rhs.astype(np.float64)
-            sol = np.zeros((mtx.shape[1],), dtype=np.float64)
-            status = self.funs.solve(sys, mtx.indptr, indx, mtx.data, sol, rhs,
-                                      self._numeric, self.control, self.info)
-        else:
-            rhs = rhs.astype(np.complex128)
-            sol = np.zeros((mtx.shape[1],), dtype=np.complex128)
-            mreal, mimag = mtx.data.real.copy(), mtx.data.imag.copy()
-            sreal, simag = sol.real.copy(), sol.imag.copy()
-            rreal, rimag = rhs.real.copy(), rhs.imag.copy()
-            status = self.funs.solve(sys, mtx.indptr, indx,
-                                      mreal, mimag, sreal, simag, rreal, rimag,
-                                      self._numeric, self.control, self.info)
-            sol.real, sol.imag = sreal, simag
+        return sys, self._getIndx(mtx)
 
-        # self.funs.report_info( self.control, self.info )
-        # pause()
+    def check_status(self, status, sol):
+        """
+        Check the status of a solve giving `sol`, e.g. one returned by
+        solve_raw(): warn and zero the nan and inf entries of `sol` for a
+        singular matrix, raise RuntimeError on errors.
+        """
         if status != UMFPACK_OK:
             if status == UMFPACK_WARNING_singular_matrix:
                 ## Change inf, nan to zeros.
@@ -730,18 +1144,40 @@ class UmfpackContext(Struct):
             else:
                 raise RuntimeError('%s failed with %s' % (self.funs.solve,
                                                            umfStatus[status]))
-        econd = 1.0 / self.info[UMFPACK_RCOND]
-        if econd > self.maxCond:
+
+    def check_condition(self):
+        """
+        Warn if the estimated condition number of the factorized matrix
+        exceeds self.maxCond.
+        """
+        rcond = self.info[UMFPACK_RCOND]
+        # Also false for nan, i.e. an unknown rcond.
+        if rcond < 1.0 / self.maxCond:
+            econd = 1.0 / rcond if rcond > 0.0 else np.inf
             msg = '(almost) singular matrix! '\
                   + '(estimated cond. number: %.2e)' % econd
             warnings.warn(msg, UmfpackWarning)
 
-        return sol
+    def workspace(self, n):
+        """
+        Allocate the workspace arrays for `solve()` of a system of size n.
+
+        Returns
+        -------
+        Wi : ndarray
+            Integer workspace of size n with the index type of the family.
+        W : ndarray
+            Double workspace of size 5*n (real) or 10*n (complex), enough
+            for iterative refinement.
+        """
+        Wi = np.empty((n,), dtype=self._indexType)
+        W = np.empty(((5 if self.isReal else 10) * n,), dtype=np.float64)
+        return Wi, W
 
     ##
     # 30.11.2005, c
     # 01.12.2005
-    def linsolve(self, sys, mtx, rhs, autoTranspose=False):
+    def linsolve(self, sys, mtx, rhs, autoTranspose=False, keep_factors=False):
         """
         One-shot solution of system of linear equation. Reuses Numeric object
         if possible.
@@ -758,6 +1194,10 @@ class UmfpackContext(Struct):
         autoTranspose : bool
             Automatically changes `sys` to the transposed type, if `mtx` is in CSR,
             since UMFPACK assumes CSC internally
+        keep_factors : bool
+            If True, keep the Symbolic and Numeric objects, so that further
+            calls with the same matrix only solve. Otherwise they are freed.
+            The values of `mtx` must not be changed while they are kept.
 
         Returns
         -------
@@ -765,8 +1205,8 @@ class UmfpackContext(Struct):
             Solution to the equation system.
         """
 
-        if sys not in umfSys:
-            raise ValueError('sys must be in' % umfSys)
+        if sys not in _umfSysSet:
+            raise ValueError('sys must be in %s (got %s)' % (umfSys, sys))
 
         if self._numeric is None:
             self.numeric(mtx)
@@ -775,17 +1215,18 @@ class UmfpackContext(Struct):
                 self.numeric(mtx)
 
         sol = self.solve(sys, mtx, rhs, autoTranspose)
-        self.free()
+        if not keep_factors:
+            self.free()
 
         return sol
 
     ##
     # 30.11.2005, c
     # 01.12.2005
-    def __call__(self, sys, mtx, rhs, autoTranspose=False):
+    def __call__(self, sys, mtx, rhs, autoTranspose=False, keep_factors=False):
         """
         Uses solve() or linsolve() depending on the presence of the Numeric
-        object.
+        object of `mtx`.
 
         Parameters
         ----------
@@ -799,6 +1240,9 @@ class UmfpackContext(Struct):
         autoTranspose : bool
             Automatically changes `sys` to the transposed type, if `mtx` is in CSR,
             since UMFPACK assumes CSC internally
+        keep_factors : bool
+            Passed to linsolve(). With True, repeated calls with the same
+            matrix factorize it only once.
 
         Returns
         -------
@@ -807,16 +1251,17 @@ class UmfpackContext(Struct):
 
         """
 
-        if self._numeric is not None:
+        if self._numeric is not None and self.mtx is mtx:
             return self.solve(sys, mtx, rhs, autoTranspose)
         else:
-            return self.linsolve(sys, mtx, rhs, autoTranspose)
+            return self.linsolve(sys, mtx, rhs, autoTranspose, keep_factors)
 
     ##
     # 21.09.2006, added by Nathan Bell
-    def lu(self, mtx):
+    def lu(self, mtx, out=None):
         """
-        Perform LU decomposition.
+        Perform LU decomposition. The Numeric object is reused if it was
+        computed for `mtx` in CSC format.
 
         For a given matrix A, the decomposition satisfies::
 
@@ -827,6 +1272,10 @@ class UmfpackContext(Struct):
         ----------
         mtx : scipy.sparse.csc_matrix or scipy.sparse.csr_matrix
             Input.
+        out : tuple, optional
+            The result of a previous lu() call. Its arrays are reused for
+            the result, where their shapes and types fit, so its factors
+            are overwritten.
 
         Returns
         -------
@@ -845,9 +1294,10 @@ class UmfpackContext(Struct):
 
         """
 
-        # this should probably be changed
-        mtx = mtx.tocsc()
-        self.numeric(mtx)
+        if mtx.format != 'csc':
+            mtx = mtx.tocsc()
+        if (self._numeric is None) or (self.mtx is not mtx):
+            self.numeric(mtx)
 
         # first find out how much space to reserve
         (status, lnz, unz, n_row, n_col, nz_udiag)\
@@ -857,63 +1307,42 @@ class UmfpackContext(Struct):
             raise RuntimeError('%s failed with %s' % (self.funs.get_lunz,
                                                        umfStatus[status]))
 
-        # allocate storage for decomposition data
-        i_type = mtx.indptr.dtype
+        # allocate storage for decomposition data, get_numeric() fills it
+        # completely
+        i_type, v_type = self._indexType, self._dataType
 
-        Lp = np.zeros((n_row+1,), dtype=i_type)
-        Lj = np.zeros((lnz,), dtype=i_type)
-        Lx = np.zeros((lnz,), dtype=np.double)
-
-        Up = np.zeros((n_col+1,), dtype=i_type)
-        Ui = np.zeros((unz,), dtype=i_type)
-        Ux = np.zeros((unz,), dtype=np.double)
-
-        P = np.zeros((n_row,), dtype=i_type)
-        Q = np.zeros((n_col,), dtype=i_type)
-
-        Dx = np.zeros((min(n_row,n_col),), dtype=np.double)
+        sizes = (n_row+1, lnz, lnz, n_col+1, unz, unz, n_row, n_col, n_row)
+        types = (i_type, i_type, v_type, i_type, i_type, v_type,
+                 i_type, i_type, np.double)
+        if out is None:
+            out = (None,) * len(sizes)
+        else:
+            L, U, P, Q, R = out[:5]
+            out = (L.indptr, L.indices, L.data, U.indptr, U.indices, U.data,
+                   P, Q, R)
 
-        Rs = np.zeros((n_row,), dtype=np.double)
+        Lp, Lj, Lx, Up, Ui, Ux, P, Q, Rs\
+            = [_reuseArray(buf, n, dtype)
+               for buf, n, dtype in zip(out, sizes, types)]
 
+        # The diagonal of U is not needed, so Dx, Dz are NULL.
         if self.isReal:
             (status,do_recip) = self.funs.get_numeric(Lp,Lj,Lx,Up,Ui,Ux,
-                                                       P,Q,Dx,Rs,
+                                                       P,Q,None,Rs,
                                                        self._numeric)
-
-            if status != UMFPACK_OK:
-                raise RuntimeError('%s failed with %s'
-                        % (self.funs.get_numeric, umfStatus[status]))
-
-            L = sp.csr_matrix((Lx,Lj,Lp),(n_row,min(n_row,n_col)))
-            U = sp.csc_matrix((Ux,Ui,Up),(min(n_row,n_col),n_col))
-            R = Rs
-
-            return (L,U,P,Q,R,bool(do_recip))
-
         else:
-            # allocate additional storage for imaginary parts
-            Lz = np.zeros((lnz,), dtype=np.double)
-            Uz = np.zeros((unz,), dtype=np.double)
-            Dz = np.zeros((min(n_row,n_col),), dtype=np.double)
-
-            (status,do_recip) = self.funs.get_numeric(Lp,Lj,Lx,Lz,Up,Ui,Ux,Uz,
-                                                      P,Q,Dx,Dz,Rs,
-                                                      self._numeric)
+            # Packed complex arrays: the imaginary parts are NULL.
+            (status,do_recip) = self.funs.get_numeric(Lp,Lj,_packComplex(Lx),None,
+                                                      Up,Ui,_packComplex(Ux),None,
+                                                      P,Q,None,None,
+                                                      Rs,self._numeric)
 
-            if status != UMFPACK_OK:
-                raise RuntimeError('%s failed with %s'
-                        % (self.funs.get_numeric, umfStatus[status]))
-
-            Lxz = np.zeros((lnz,), dtype=np.complex128)
-            Uxz = np.zeros((unz,), dtype=np.complex128)
-            Dxz = np.zeros((min(n_row,n_col),), dtype=np.complex128)
-
-            Lxz.real,Lxz.imag = Lx,Lz
-            Uxz.real,Uxz.imag = Ux,Uz
-            Dxz.real,Dxz.imag = Dx,Dz
+        if status != UMFPACK_OK:
+            raise RuntimeError('%s failed with %s'
+                    % (self.funs.get_numeric, umfStatus[status]))
 
-            L = sp.csr_matrix((Lxz,Lj,Lp),(n_row,min(n_row,n_col)))
-            U = sp.csc_matrix((Uxz,Ui,Up),(min(n_row,n_col),n_col))
-            R = Rs
+        L = sp.csr_matrix((Lx,Lj,Lp),(n_row,min(n_row,n_col)))
+        U = sp.csc_matrix((Ux,Ui,Up),(min(n_row,n_col),n_col))
+        R = Rs
 
-            return (L,U,P,Q,R,bool(do_recip))
+        return (L,U,P,Q,R,bool(do_recip))